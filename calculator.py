@@ -1,8 +1,10 @@
-from logic.european import EuropeanOption
-from logic.american import AmericanOption
-from logic.asian import AsianOption
-from logic.barrier import BarrierOption
-from utils.validators import (validate_option_params, validate_barrier_params, validate_asian_params)
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from logic.black_scholes import BlackScholesModel
+from utils.validators import (validate_option_params, validate_barrier_params, validate_asian_params,
+                              validate_engine_params, validate_engine_choice, validate_lattice_params,
+                              validate_analytic_params, validate_pde_params)
 
 
 class OptionCalculator:
@@ -31,14 +33,26 @@ class OptionCalculator:
         # Monte Carlo
         num_simulations = int(self.config.get('num_simulations', 10000))
         num_steps = int(self.config.get('num_steps', 252))
+        seed = self.config.get('seed')
+        seed = int(seed) if seed is not None else None
+        engine = self.config.get('engine')
+        if engine is None:
+            engine = default_engine(option_style, self.config.get('monitoring', 'continuous'))
+        engine = str(engine).lower()
+        is_valid, error_msg = validate_engine_choice(option_style, engine)
+        if not is_valid:
+            raise ValueError(f"Invalid parameters: {error_msg}")
+        engine_options = self.engine_options(engine)
 
-        # create the correct option stats
+        # create the correct option stats; each style imports only its own engines
         if option_style == 'european':
+            from logic.european import EuropeanOption
             self.option = EuropeanOption(S, K, T, r, sigma, q, option_type)
 
         elif option_style == 'american':
+            from logic.american import AmericanOption
             self.option = AmericanOption(S, K, T, r, sigma, q, option_type,
-                                        num_simulations, num_steps)
+                                        num_simulations, num_steps, seed, engine=engine, **engine_options)
 
         elif option_style == 'asian':
             average_type = self.config.get('average_type', 'arithmetic')
@@ -46,20 +60,32 @@ class OptionCalculator:
             if not is_valid:
                 raise ValueError(f"Invalid Asian option parameters: {error_msg}")
 
+            control_variate = bool(self.config.get('control_variate', True))
+
+            from logic.asian import AsianOption
             self.option = AsianOption(S, K, T, r, sigma, q, option_type,
-                                     average_type, num_simulations, num_steps)
+                                     average_type, num_simulations, num_steps, seed,
+                                     control_variate=control_variate, **engine_options)
 
         elif option_style == 'barrier':
             barrier_type = self.config['barrier_type'].lower()
             barrier_level = float(self.config['barrier_level'])
+            rebate = float(self.config.get('rebate', 0.0))
+            monitoring = str(self.config.get('monitoring', 'continuous')).lower()
+            monitoring_points = self.config.get('monitoring_points')
+            monitoring_points = int(monitoring_points) if monitoring_points is not None else None
 
-            is_valid, error_msg = validate_barrier_params(barrier_type, barrier_level, S)
+            is_valid, error_msg = validate_barrier_params(barrier_type, barrier_level, S, rebate, monitoring,
+                                                          monitoring_points)
             if not is_valid:
                 raise ValueError(f"Invalid barrier option parameters: {error_msg}")
 
+            from logic.barrier import BarrierOption
             self.option = BarrierOption(S, K, T, r, sigma, q, option_type,
                                        barrier_type, barrier_level,
-                                       num_simulations, num_steps)
+                                       num_simulations, num_steps, seed,
+                                       rebate=rebate, monitoring=monitoring,
+                                       monitoring_points=monitoring_points, engine=engine, **engine_options)
 
         else:
             raise ValueError(f"Invalid option style: {option_style}. "
@@ -67,6 +93,62 @@ class OptionCalculator:
 
         return self.option
 
+    def engine_options(self, engine='monte_carlo'):
+
+        if engine == 'lattice':
+            method = str(self.config.get('lattice_method', 'crr')).lower()
+            is_valid, error_msg = validate_lattice_params(method)
+            if not is_valid:
+                raise ValueError(f"Invalid lattice parameters: {error_msg}")
+
+            return {'method': method, 'richardson': bool(self.config.get('richardson', False))}
+
+        if engine == 'analytic':
+            method = str(self.config.get('analytic_method', 'bjerksund-stensland')).lower()
+            is_valid, error_msg = validate_analytic_params(method)
+            if not is_valid:
+                raise ValueError(f"Invalid analytic parameters: {error_msg}")
+
+            return {'method': method}
+
+        if engine == 'pde':
+            grid_points = int(self.config.get('grid_points', 200))
+            rannacher_steps = int(self.config.get('rannacher_steps', 2))
+            is_valid, error_msg = validate_pde_params(grid_points, rannacher_steps)
+            if not is_valid:
+                raise ValueError(f"Invalid PDE parameters: {error_msg}")
+
+            return {'grid_points': grid_points, 'rannacher_steps': rannacher_steps}
+
+        # optional MonteCarloEngine settings
+        chunk_size = self.config.get('chunk_size')
+        chunk_size = int(chunk_size) if chunk_size is not None else None
+        num_workers = int(self.config.get('num_workers', 1))  # 0 = one thread per CPU
+        target_error = self.config.get('target_error')
+        target_error = float(target_error) if target_error is not None else None
+        max_simulations = self.config.get('max_simulations')
+        max_simulations = int(max_simulations) if max_simulations is not None else None
+        sampling = str(self.config.get('sampling', 'pseudo')).lower()
+        lsm_basis = str(self.config.get('lsm_basis', 'monomial')).lower()
+        lsm_degree = int(self.config.get('lsm_degree', 2))
+        greeks = str(self.config.get('mc_greeks', 'pathwise')).lower()
+
+        is_valid, error_msg = validate_engine_params(chunk_size, num_workers, target_error, max_simulations, sampling,
+                                                     lsm_basis, lsm_degree, greeks)
+        if not is_valid:
+            raise ValueError(f"Invalid Monte Carlo parameters: {error_msg}")
+
+        return {
+            'chunk_size': chunk_size,
+            'num_workers': num_workers,
+            'target_error': target_error,
+            'max_simulations': max_simulations,
+            'sampling': sampling,
+            'lsm_basis': lsm_basis,
+            'lsm_degree': lsm_degree,
+            'greeks': greeks
+        }
+
     def calculate(self, compute_greeks=True):
 
         if self.option is None:
@@ -82,12 +164,109 @@ class OptionCalculator:
             'parameters': self.config
         }
 
+        # Monte Carlo styles also report the accuracy of the price
+        if hasattr(self.option, 'estimate'):
+            estimate = self.option.estimate()
+            if estimate['num_paths'] > 0:
+                self.results['std_error'] = float(estimate['std_error'])
+                self.results['num_paths'] = int(estimate['num_paths'])
+
         return self.results
 
     def get_results(self):
         return self.results
 
 
+def default_engine(option_style, monitoring='continuous'):
+    # continuously monitored barriers have a closed form; everything else is simulated unless told otherwise
+    if option_style == 'barrier' and str(monitoring).lower() == 'continuous':
+        return 'analytic'
+    return 'monte_carlo'
+
+
 def calculate_from_config(config, compute_greeks=True):
     calculator = OptionCalculator(config)
-    return calculator.calculate(compute_greeks)
\ No newline at end of file
+    return calculator.calculate(compute_greeks)
+
+
+def _calculate_position(index, config, compute_greeks):
+    # worker entry point - must stay at module level so it can be pickled
+    try:
+        result = calculate_from_config(config, compute_greeks)
+    except Exception as e:
+        # any failure is this position's alone: report it inline, never abort the book
+        return {'position': index, 'error': str(e), 'parameters': config}
+    return {'position': index, **result}
+
+
+def _calculate_european_batch(positions, compute_greeks):
+
+    valid = []
+    for index, config in positions:
+        try:
+            S = float(config['underlying_price'])
+            K = float(config['strike_price'])
+            T = float(config['time_to_maturity'])
+            r = float(config['risk_free_rate'])
+            sigma = float(config['volatility'])
+            q = float(config.get('dividend_yield', 0))
+            option_type = config['option_type'].lower()
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
+            yield {'position': index, 'error': str(e), 'parameters': config}
+            continue
+
+        is_valid, error_msg = validate_option_params(S, K, T, r, sigma, q)
+        if not is_valid:
+            yield {'position': index, 'error': f"Invalid parameters: {error_msg}", 'parameters': config}
+            continue
+
+        valid.append((index, config, (S, K, T, r, sigma, q, option_type)))
+
+    if not valid:
+        return
+
+    columns = list(zip(*(params for _, _, params in valid)))
+    batch = BlackScholesModel.price_batch(*(np.array(c) for c in columns))
+
+    for i, (index, config, _) in enumerate(valid):
+        greeks = None
+        if compute_greeks:
+            greeks = {name: float(batch[name][i]) for name in ('delta', 'gamma', 'vega', 'theta', 'rho')}
+        yield {
+            'position': index,
+            'price': float(batch['price'][i]),
+            'greeks': greeks,
+            'parameters': config
+        }
+
+
+def calculate_portfolio(configs, compute_greeks=True, max_workers=None):
+    """
+    Value many positions, yielding each result as soon as it is ready.
+
+    European positions are priced together in one vectorised Black-Scholes
+    pass; Monte Carlo styles are spread over a process pool (one worker per
+    CPU by default). Results carry a 'position' index into configs since
+    they are not returned in input order; positions that fail validation
+    are yielded with an 'error' message instead of a price.
+    """
+
+    european = []
+    simulated = []
+    for index, config in enumerate(configs):
+        if str(config.get('option_style', '')).lower() == 'european':
+            european.append((index, config))
+        else:
+            simulated.append((index, config))
+
+    yield from _calculate_european_batch(european, compute_greeks)
+
+    if not simulated:
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(simulated))) as pool:
+        futures = [pool.submit(_calculate_position, index, config, compute_greeks)
+                   for index, config in simulated]
+        for future in as_completed(futures):
+            yield future.result()
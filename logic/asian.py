@@ -1,9 +1,10 @@
 from .monte_carlo import MonteCarloEngine
+from .black_scholes import BlackScholesModel
 
 
 class AsianOption:
 
-    def __init__(self, S, K, T, r, sigma, q=0, option_type='call', average_type='arithmetic', num_simulations=10000, num_steps=252):
+    def __init__(self, S, K, T, r, sigma, q=0, option_type='call', average_type='arithmetic', num_simulations=10000, num_steps=252, seed=None, control_variate=True, **engine_options):
         self.S = S
         self.K = K
         self.T = T
@@ -14,93 +15,109 @@ class AsianOption:
         self.average_type = average_type.lower()
         self.num_simulations = num_simulations
         self.num_steps = num_steps
-        self.mc_engine = MonteCarloEngine(num_simulations, num_steps)
+        # arithmetic averages use the closed-form geometric Asian as a control
+        # variate; geometric averages are priced by the closed form outright
+        self.control_variate = control_variate
+        # one engine per option: price and every bumped Greek reuse its shocks
+        self.mc_engine = MonteCarloEngine(num_simulations, num_steps, seed, **engine_options)
+        self._estimates = {}
+
+    def _estimate_at(self, S=None, T=None, r=None, sigma=None, greeks=False):
+
+        scenario = (self.S if S is None else S, self.K, self.T if T is None else T,
+                    self.r if r is None else r, self.sigma if sigma is None else sigma, self.q)
+
+        if scenario not in self._estimates or (greeks and 'greeks' not in self._estimates[scenario]):
+            if S is not None or T is not None or r is not None or sigma is not None:
+                # the base valuation goes first so it decides the adaptive path count
+                self._estimate_at()
+            if self.average_type == 'geometric':
+                price = BlackScholesModel.geometric_asian_price(*scenario, self.option_type, self.num_steps)
+                self._estimates[scenario] = {'price': price, 'std_error': 0.0, 'num_paths': 0}
+            else:
+                self._estimates[scenario] = self.mc_engine.estimate_asian(*scenario, self.option_type, self.average_type,
+                                                                          self.control_variate, greeks)
+
+        return self._estimates[scenario]
+
+    def _price_at(self, **scenario):
+        return self._estimate_at(**scenario)['price']
+
+    def _simulated_greeks(self):
+        # pathwise / likelihood-ratio Greeks from the pricing simulation, if the engine estimates them
+        if self.average_type == 'geometric' or self.mc_engine.greeks != 'pathwise':
+            return None
+        return self._estimate_at(greeks=True)['greeks']
+
+    def estimate(self):
+        """Price with its Monte Carlo standard error and the number of paths used"""
+        return self._estimate_at()
 
     def price(self):
-       return self.mc_engine.price_asian(self.S, self.K, self.T, self.r, self.sigma, self.q, self.option_type, self.average_type)
+       return self._price_at()
 
     def delta(self, bump=0.01):
 
-        S_up = self.S + bump
-        S_down = self.S - bump
+        greeks = self._simulated_greeks()
+        if greeks is not None:
+            return greeks['delta']
 
-        mc_up = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_down = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-
-        price_up = mc_up.price_asian(S_up, self.K, self.T, self.r, self.sigma, self.q,
-                                      self.option_type, self.average_type)
-        price_down = mc_down.price_asian(S_down, self.K, self.T, self.r, self.sigma, self.q,
-                                          self.option_type, self.average_type)
+        price_up = self._price_at(S=self.S + bump)
+        price_down = self._price_at(S=self.S - bump)
 
         return (price_up - price_down) / (2 * bump)
 
     def gamma(self, bump=0.01):
 
-        S_up = self.S + bump
-        S_down = self.S - bump
-
-        mc_up = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_center = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_down = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
+        greeks = self._simulated_greeks()
+        if greeks is not None:
+            return greeks['gamma']
 
-        price_up = mc_up.price_asian(S_up, self.K, self.T, self.r, self.sigma, self.q,
-                                      self.option_type, self.average_type)
-        price_center = mc_center.price_asian(self.S, self.K, self.T, self.r, self.sigma, self.q,
-                                              self.option_type, self.average_type)
-        price_down = mc_down.price_asian(S_down, self.K, self.T, self.r, self.sigma, self.q,
-                                          self.option_type, self.average_type)
+        price_up = self._price_at(S=self.S + bump)
+        price_center = self._price_at()
+        price_down = self._price_at(S=self.S - bump)
 
         return (price_up - 2 * price_center + price_down) / (bump ** 2)
 
     def vega(self, bump=0.01):
 
-        sigma_up = self.sigma + bump
-        sigma_down = self.sigma - bump
-
-        mc_up = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_down = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
+        greeks = self._simulated_greeks()
+        if greeks is not None:
+            return greeks['vega']
 
-        price_up = mc_up.price_asian(self.S, self.K, self.T, self.r, sigma_up, self.q,
-                                      self.option_type, self.average_type)
-        price_down = mc_down.price_asian(self.S, self.K, self.T, self.r, sigma_down, self.q,
-                                          self.option_type, self.average_type)
+        price_up = self._price_at(sigma=self.sigma + bump)
+        price_down = self._price_at(sigma=self.sigma - bump)
 
         return (price_up - price_down) / (2 * bump) / 100
 
     def theta(self, bump=1/365):
 
-        T_down = max(self.T - bump, 0)
+        greeks = self._simulated_greeks()
+        if greeks is not None:
+            return greeks['theta']
 
-        mc_center = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_down = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-
-        price_center = mc_center.price_asian(self.S, self.K, self.T, self.r, self.sigma, self.q,
-                                              self.option_type, self.average_type)
-        price_down = mc_down.price_asian(self.S, self.K, T_down, self.r, self.sigma, self.q,
-                                          self.option_type, self.average_type)
+        price_center = self._price_at()
+        price_down = self._price_at(T=max(self.T - bump, 0))
 
         return (price_down - price_center) / bump
 
     def rho(self, bump=0.01):
 
-        r_up = self.r + bump
-        r_down = self.r - bump
-
-        mc_up = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_down = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
+        greeks = self._simulated_greeks()
+        if greeks is not None:
+            return greeks['rho']
 
-        price_up = mc_up.price_asian(self.S, self.K, self.T, r_up, self.sigma, self.q,
-                                      self.option_type, self.average_type)
-        price_down = mc_down.price_asian(self.S, self.K, self.T, r_down, self.sigma, self.q,
-                                          self.option_type, self.average_type)
+        price_up = self._price_at(r=self.r + bump)
+        price_down = self._price_at(r=self.r - bump)
 
         return (price_up - price_down) / (2 * bump) / 100
 
     def get_all_greeks(self):
+
         return {
             'delta': self.delta(),
             'gamma': self.gamma(),
             'vega': self.vega(),
             'theta': self.theta(),
             'rho': self.rho()
-        }
\ No newline at end of file
+        }
@@ -1,11 +1,10 @@
-import numpy as np
 from .monte_carlo import MonteCarloEngine
-from scipy.stats import norm
+from .barrier_analytic import ReinerRubinsteinModel
 
 
 class BarrierOption:
 
-    def __init__(self, S, K, T, r, sigma, q=0, option_type='call', barrier_type='down-and-out', barrier_level=None, num_simulations=10000, num_steps=252):
+    def __init__(self, S, K, T, r, sigma, q=0, option_type='call', barrier_type='down-and-out', barrier_level=None, num_simulations=10000, num_steps=252, seed=None, rebate=0.0, monitoring='continuous', monitoring_points=None, engine=None, **engine_options):
         self.S = S
         self.K = K
         self.T = T
@@ -15,128 +14,206 @@ class BarrierOption:
         self.option_type = option_type.lower()
         self.barrier_type = barrier_type.lower()
         self.barrier_level = barrier_level
+        self.rebate = rebate
+        self.monitoring = monitoring
+        self.monitoring_points = monitoring_points
         self.num_simulations = num_simulations
         self.num_steps = num_steps
-        self.mc_engine = MonteCarloEngine(num_simulations, num_steps)
+        self._estimates = {}
+        self._deterministic_results = None
+        self.pde_engine = None
 
         if barrier_level is None:
             raise ValueError("barrier_level is required for barrier options")
 
+        if engine is None:
+            engine = 'analytic' if monitoring == 'continuous' else 'monte_carlo'
+        if engine == 'analytic' and monitoring != 'continuous':
+            raise ValueError("The analytic engine prices continuously monitored barriers only")
+
+        if engine == 'pde':
+            # finite differences for either monitoring: price and all Greeks from one batch solve
+            from .finite_difference import FiniteDifferenceEngine
+            self.pde_engine = FiniteDifferenceEngine(num_steps, **engine_options)
+            self.mc_engine = None
+            if monitoring != 'continuous':
+                self.monitoring_points = monitoring_points or num_steps
+        elif engine == 'analytic':
+            # Reiner-Rubinstein closed form: price and all Greeks in one call
+            self.mc_engine = None
+        else:
+            # barrier checked at monitoring_points equally spaced dates (default:
+            # every step; num_steps may be much coarser than the schedule), or
+            # continuously through a Brownian-bridge crossing probability
+            # one engine per option: price and every bumped Greek reuse its shocks
+            self.mc_engine = MonteCarloEngine(num_simulations, num_steps, seed, **engine_options)
+
+    def _pde_monitoring_points(self):
+        return None if self.monitoring == 'continuous' else self.monitoring_points
+
+    def _deterministic(self):
+
+        if self._deterministic_results is None:
+            if self.pde_engine is not None:
+                results = self.pde_engine.barrier_batch(self.S, self.K, self.T, self.r, self.sigma, self.q,
+                                                        self.option_type, self.barrier_type, self.barrier_level,
+                                                        self.rebate, self._pde_monitoring_points())
+            else:
+                results = ReinerRubinsteinModel.price_batch(self.S, self.K, self.T, self.r, self.sigma, self.q,
+                                                            self.option_type, self.barrier_type, self.barrier_level,
+                                                            self.rebate)
+            self._deterministic_results = {name: float(value) for name, value in results.items()}
+
+        return self._deterministic_results
+
+    def _estimate_at(self, S=None, T=None, r=None, sigma=None, greeks=False):
+
+        if self.mc_engine is None:
+            if S is None and T is None and r is None and sigma is None:
+                return {'price': self._deterministic()['price'], 'std_error': 0.0, 'num_paths': 0}
+            if self.pde_engine is not None:
+                price = self.pde_engine.price_barrier(self.S if S is None else S, self.K, self.T if T is None else T,
+                                                      self.r if r is None else r,
+                                                      self.sigma if sigma is None else sigma, self.q,
+                                                      self.option_type, self.barrier_type, self.barrier_level,
+                                                      self.rebate, self._pde_monitoring_points())
+                return {'price': price, 'std_error': 0.0, 'num_paths': 0}
+            price = ReinerRubinsteinModel.price_batch(self.S if S is None else S, self.K, self.T if T is None else T,
+                                                      self.r if r is None else r,
+                                                      self.sigma if sigma is None else sigma, self.q,
+                                                      self.option_type, self.barrier_type, self.barrier_level,
+                                                      self.rebate, compute_greeks=False)['price']
+            return {'price': float(price), 'std_error': 0.0, 'num_paths': 0}
+
+        scenario = (self.S if S is None else S, self.K, self.T if T is None else T,
+                    self.r if r is None else r, self.sigma if sigma is None else sigma, self.q)
+
+        if scenario not in self._estimates or (greeks and 'greeks' not in self._estimates[scenario]):
+            if S is not None or T is not None or r is not None or sigma is not None:
+                # the base valuation goes first so it decides the adaptive path count
+                self._estimate_at()
+            self._estimates[scenario] = self.mc_engine.estimate_barrier(
+                *scenario, self.option_type, self.barrier_type, self.barrier_level, self.rebate,
+                self.monitoring, self.monitoring_points, greeks
+            )
+
+        return self._estimates[scenario]
+
+    def _price_at(self, **scenario):
+        return self._estimate_at(**scenario)['price']
+
+    def _step_monitored(self):
+        # the barrier is checked exactly at simulation steps, with no bridge smoothing between them
+        monitoring_points = self.monitoring_points or self.num_steps
+        return self.monitoring != 'continuous' and self.num_steps % monitoring_points == 0
+
+    def _simulated_greeks(self, name):
+        # pathwise / likelihood-ratio Greeks from the pricing simulation, if the engine estimates them
+        if self.mc_engine is None or self.mc_engine.greeks != 'pathwise':
+            return None
+        if self._step_monitored() and name != 'gamma':
+            # a barrier checked only at the steps leaves likelihood ratios, whose variance grows
+            # as 1 / dt: bumping on the same shocks is far steadier for all but gamma, which a
+            # bump of the knocked payoff cannot resolve at all
+            return None
+        return self._estimate_at(greeks=True)['greeks']
+
+    def estimate(self):
+        """Price with its Monte Carlo standard error and the number of paths used"""
+        return self._estimate_at()
+
     def price(self):
-        return self.mc_engine.price_barrier(
-            self.S, self.K, self.T, self.r, self.sigma, self.q,
-            self.option_type, self.barrier_type, self.barrier_level
-        )
+        return self._price_at()
 
     def price_closed_form(self):
+        """Continuously monitored price, whatever monitoring the option uses"""
+        if self.mc_engine is None and self.pde_engine is None:
+            return self._deterministic()['price']
 
-        if self.barrier_type == 'down-and-out' and self.option_type == 'call':
-            H = self.barrier_level
-            if self.S <= H:
-                return 0
-
-            lambda_val = (self.r - self.q + 0.5 * self.sigma**2) / (self.sigma**2)
-            y = np.log(H**2 / (self.S * self.K)) / (self.sigma * np.sqrt(self.T)) + lambda_val * self.sigma * np.sqrt(self.T)
-            x1 = np.log(self.S / H) / (self.sigma * np.sqrt(self.T)) + lambda_val * self.sigma * np.sqrt(self.T)
-            y1 = np.log(H / self.S) / (self.sigma * np.sqrt(self.T)) + lambda_val * self.sigma * np.sqrt(self.T)
-
-            if self.K > H:
-                from .black_scholes import BlackScholesModel
-                bs = BlackScholesModel()
-                vanilla_call = bs.call_price(self.S, self.K, self.T, self.r, self.sigma, self.q)
-
-                correction = (self.S * np.exp(-self.q * self.T) * (H / self.S)**(2 * lambda_val) * norm.cdf(y) -
-                             self.K * np.exp(-self.r * self.T) * (H / self.S)**(2 * lambda_val - 2) * norm.cdf(y - self.sigma * np.sqrt(self.T)))
-
-                return vanilla_call - correction
-            else:
-                return 0
-
-        return None
+        return float(ReinerRubinsteinModel.price_batch(self.S, self.K, self.T, self.r, self.sigma, self.q,
+                                                       self.option_type, self.barrier_type, self.barrier_level,
+                                                       self.rebate, compute_greeks=False)['price'])
 
     def delta(self, bump=0.01):
 
-        S_up = self.S + bump
-        S_down = self.S - bump
+        if self.mc_engine is None:
+            return self._deterministic()['delta']
 
-        mc_up = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_down = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
+        greeks = self._simulated_greeks('delta')
+        if greeks is not None:
+            return greeks['delta']
 
-        price_up = mc_up.price_barrier(S_up, self.K, self.T, self.r, self.sigma, self.q,
-                                        self.option_type, self.barrier_type, self.barrier_level)
-        price_down = mc_down.price_barrier(S_down, self.K, self.T, self.r, self.sigma, self.q,
-                                            self.option_type, self.barrier_type, self.barrier_level)
+        price_up = self._price_at(S=self.S + bump)
+        price_down = self._price_at(S=self.S - bump)
 
         return (price_up - price_down) / (2 * bump)
 
     def gamma(self, bump=0.01):
 
-        S_up = self.S + bump
-        S_down = self.S - bump
+        if self.mc_engine is None:
+            return self._deterministic()['gamma']
 
-        mc_up = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_center = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_down = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
+        greeks = self._simulated_greeks('gamma')
+        if greeks is not None:
+            return greeks['gamma']
 
-        price_up = mc_up.price_barrier(S_up, self.K, self.T, self.r, self.sigma, self.q,
-                                        self.option_type, self.barrier_type, self.barrier_level)
-        price_center = mc_center.price_barrier(self.S, self.K, self.T, self.r, self.sigma, self.q,
-                                                self.option_type, self.barrier_type, self.barrier_level)
-        price_down = mc_down.price_barrier(S_down, self.K, self.T, self.r, self.sigma, self.q,
-                                            self.option_type, self.barrier_type, self.barrier_level)
+        price_up = self._price_at(S=self.S + bump)
+        price_center = self._price_at()
+        price_down = self._price_at(S=self.S - bump)
 
         return (price_up - 2 * price_center + price_down) / (bump ** 2)
 
     def vega(self, bump=0.01):
 
-        sigma_up = self.sigma + bump
-        sigma_down = self.sigma - bump
+        if self.mc_engine is None:
+            return self._deterministic()['vega']
 
-        mc_up = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_down = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
+        greeks = self._simulated_greeks('vega')
+        if greeks is not None:
+            return greeks['vega']
 
-        price_up = mc_up.price_barrier(self.S, self.K, self.T, self.r, sigma_up, self.q,
-                                        self.option_type, self.barrier_type, self.barrier_level)
-        price_down = mc_down.price_barrier(self.S, self.K, self.T, self.r, sigma_down, self.q,
-                                            self.option_type, self.barrier_type, self.barrier_level)
+        price_up = self._price_at(sigma=self.sigma + bump)
+        price_down = self._price_at(sigma=self.sigma - bump)
 
         return (price_up - price_down) / (2 * bump) / 100
 
     def theta(self, bump=1/365):
 
-        T_down = max(self.T - bump, 0)
+        if self.mc_engine is None:
+            return self._deterministic()['theta']
 
-        mc_center = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_down = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
+        greeks = self._simulated_greeks('theta')
+        if greeks is not None:
+            return greeks['theta']
 
-        price_center = mc_center.price_barrier(self.S, self.K, self.T, self.r, self.sigma, self.q,
-                                                self.option_type, self.barrier_type, self.barrier_level)
-        price_down = mc_down.price_barrier(self.S, self.K, T_down, self.r, self.sigma, self.q,
-                                            self.option_type, self.barrier_type, self.barrier_level)
+        price_center = self._price_at()
+        price_down = self._price_at(T=max(self.T - bump, 0))
 
         return (price_down - price_center) / bump
 
     def rho(self, bump=0.01):
 
-        r_up = self.r + bump
-        r_down = self.r - bump
+        if self.mc_engine is None:
+            return self._deterministic()['rho']
 
-        mc_up = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
-        mc_down = MonteCarloEngine(self.num_simulations, self.num_steps, seed=42)
+        greeks = self._simulated_greeks('rho')
+        if greeks is not None:
+            return greeks['rho']
 
-        price_up = mc_up.price_barrier(self.S, self.K, self.T, r_up, self.sigma, self.q,
-                                        self.option_type, self.barrier_type, self.barrier_level)
-        price_down = mc_down.price_barrier(self.S, self.K, self.T, r_down, self.sigma, self.q,
-                                            self.option_type, self.barrier_type, self.barrier_level)
+        price_up = self._price_at(r=self.r + bump)
+        price_down = self._price_at(r=self.r - bump)
 
         return (price_up - price_down) / (2 * bump) / 100
 
     def get_all_greeks(self):
 
+        if self.mc_engine is None:
+            return {name: self._deterministic()[name] for name in ('delta', 'gamma', 'vega', 'theta', 'rho')}
+
         return {
             'delta': self.delta(),
             'gamma': self.gamma(),
             'vega': self.vega(),
             'theta': self.theta(),
             'rho': self.rho()
-        }
\ No newline at end of file
+        }
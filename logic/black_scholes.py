@@ -1,5 +1,38 @@
+import math
 import numpy as np
-from scipy.stats import norm
+
+
+_SQRT_2 = math.sqrt(2)
+_SQRT_2PI = math.sqrt(2 * math.pi)
+
+# config keys used by price_chain to read a columnar option chain
+CHAIN_FIELDS = {
+    'S': 'underlying_price',
+    'K': 'strike_price',
+    'T': 'time_to_maturity',
+    'r': 'risk_free_rate',
+    'sigma': 'volatility',
+    'q': 'dividend_yield',
+    'option_type': 'option_type',
+}
+
+
+def norm_cdf(x):
+    """
+    Standard normal CDF without scipy.stats, whose import dominates CLI
+    startup: math.erfc for scalars, scipy.special.ndtr (imported on first
+    use) for arrays
+    """
+
+    if np.ndim(x) == 0:
+        return 0.5 * math.erfc(-float(x) / _SQRT_2)
+
+    from scipy.special import ndtr
+    return ndtr(x)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / _SQRT_2PI
 
 
 class BlackScholesModel:
@@ -17,22 +50,225 @@ class BlackScholesModel:
     @staticmethod
     def call_price(S, K, T, r, sigma, q=0):
         if T <= 0: return max(S - K, 0)
-        return S * np.exp(-q * T) * norm.cdf(BlackScholesModel.d1(S, K, T, r, sigma, q)) - K * np.exp(-r * T) * norm.cdf(BlackScholesModel.d2(S, K, T, r, sigma, q))
+        return S * np.exp(-q * T) * norm_cdf(BlackScholesModel.d1(S, K, T, r, sigma, q)) - K * np.exp(-r * T) * norm_cdf(BlackScholesModel.d2(S, K, T, r, sigma, q))
 
     @staticmethod
     def put_price(S, K, T, r, sigma, q=0):
         if T <= 0: return max(K - S, 0)
-        return K * np.exp(-r * T) * norm.cdf(-BlackScholesModel.d2(S, K, T, r, sigma, q)) - S * np.exp(-q * T) * norm.cdf(-BlackScholesModel.d1(S, K, T, r, sigma, q))
+        return K * np.exp(-r * T) * norm_cdf(-BlackScholesModel.d2(S, K, T, r, sigma, q)) - S * np.exp(-q * T) * norm_cdf(-BlackScholesModel.d1(S, K, T, r, sigma, q))
+
+    @staticmethod
+    def is_call(option_type):
+        """Boolean array from a str, array of 'call'/'put' strings or a bool array"""
+
+        option_type = np.asarray(option_type)
+        if option_type.dtype == bool:
+            return option_type
+        return np.char.lower(option_type.astype(str)) == 'call'
 
     @staticmethod
-    def simulate_paths(S0, T, r, sigma, q, num_simulations, num_steps):
+    def price_batch(S, K, T, r, sigma, q=0, option_type='call', second_order=False):
+        """
+        Vectorised price and Greeks for many European options in one pass.
+
+        All inputs broadcast against each other. Expired (T <= 0) and zero-vol
+        options are handled with masks: price collapses to the (discounted)
+        intrinsic value and the curvature terms to zero.
 
+        Greeks use the same units as EuropeanOption: vega and rho per 1%,
+        theta per day. With second_order, also vanna (delta per 1% vol),
+        volga (vega per 1% vol) and charm (delta per day).
+
+        Returns dict of arrays: price, delta, gamma, vega, theta, rho and,
+        with second_order, vanna, volga, charm
+        """
+
+        S, K, T, r, sigma, q = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma, q)))
+        call = np.broadcast_to(BlackScholesModel.is_call(option_type), S.shape)
+
+        T_pos = np.maximum(T, 0)
+        sqrt_T = np.sqrt(T_pos)
+        vol_sqrt_T = sigma * sqrt_T
+        degenerate = vol_sqrt_T <= 0
+        expired = T <= 0
+
+        df_q = np.exp(-q * T_pos)
+        df_r = np.exp(-r * T_pos)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_fwd_moneyness = np.log(S / K) + (r - q) * T_pos
+            d1 = np.where(degenerate,
+                          np.where(log_fwd_moneyness > 0, np.inf, -np.inf),
+                          (log_fwd_moneyness + 0.5 * sigma ** 2 * T_pos) / vol_sqrt_T)
+            d2 = np.where(degenerate, d1, d1 - vol_sqrt_T)
+
+            sign = np.where(call, 1.0, -1.0)
+            N_d1 = norm_cdf(sign * d1)
+            N_d2 = norm_cdf(sign * d2)
+            pdf_d1 = np.where(degenerate, 0.0, norm_pdf(d1))
+
+            price = sign * (S * df_q * N_d1 - K * df_r * N_d2)
+            delta = sign * df_q * N_d1
+            gamma = np.where(degenerate, 0.0, df_q * pdf_d1 / (S * vol_sqrt_T))
+            vega = S * df_q * pdf_d1 * sqrt_T / 100
+            decay = np.where(degenerate, 0.0, S * df_q * pdf_d1 * sigma / (2 * sqrt_T))
+            theta = (-decay - sign * r * K * df_r * N_d2 + sign * q * S * df_q * N_d1) / 365
+            rho = sign * K * T_pos * df_r * N_d2 / 100
+
+            if second_order:
+                vanna = np.where(degenerate, 0.0, -df_q * pdf_d1 * d2 / sigma / 100)
+                volga = np.where(degenerate, 0.0, vega * d1 * d2 / sigma / 100)
+                drift = np.where(degenerate, 0.0,
+                                 df_q * pdf_d1 * (2 * (r - q) * T_pos - d2 * vol_sqrt_T) / (2 * T_pos * vol_sqrt_T))
+                charm = np.where(expired, 0.0, (sign * q * df_q * N_d1 - drift) / 365)
+
+        theta = np.where(expired, 0.0, theta)
+
+        results = {
+            'price': price,
+            'delta': delta,
+            'gamma': gamma,
+            'vega': vega,
+            'theta': theta,
+            'rho': rho
+        }
+        if second_order:
+            results.update(vanna=vanna, volga=volga, charm=charm)
+
+        return results
+
+    @staticmethod
+    def price_and_greeks(S, K, T, r, sigma, q=0, option_type='call'):
+        """
+        Price, the five Greeks and vanna, volga and charm for one option, in
+        the units of price_batch(second_order=True), evaluating d1, d2, N(.)
+        and the discount factors once.
+
+        Scalar inputs take a math.erfc path that avoids NumPy/SciPy per-call
+        overhead; array inputs are passed to price_batch.
+        """
+
+        if not isinstance(option_type, str) or any(np.ndim(x) for x in (S, K, T, r, sigma, q)):
+            return BlackScholesModel.price_batch(S, K, T, r, sigma, q, option_type, second_order=True)
+
+        S, K, T, r, sigma, q = (float(x) for x in (S, K, T, r, sigma, q))
+        sign = 1.0 if option_type.lower() == 'call' else -1.0
+
+        T_pos = max(T, 0.0)
+        sqrt_T = math.sqrt(T_pos)
+        vol_sqrt_T = sigma * sqrt_T
+        df_q = math.exp(-q * T_pos)
+        df_r = math.exp(-r * T_pos)
+        log_fwd_moneyness = math.log(S / K) + (r - q) * T_pos
+
+        if vol_sqrt_T <= 0:
+            # no diffusion left: the discounted forward payoff
+            N_d1 = N_d2 = 1.0 if (log_fwd_moneyness > 0) == (sign > 0) else 0.0
+            gamma = vega = decay = vanna = volga = drift = 0.0
+        else:
+            d1 = (log_fwd_moneyness + 0.5 * sigma ** 2 * T_pos) / vol_sqrt_T
+            d2 = d1 - vol_sqrt_T
+            N_d1 = 0.5 * math.erfc(-sign * d1 / _SQRT_2)
+            N_d2 = 0.5 * math.erfc(-sign * d2 / _SQRT_2)
+            pdf_d1 = math.exp(-0.5 * d1 ** 2) / _SQRT_2PI
+
+            gamma = df_q * pdf_d1 / (S * vol_sqrt_T)
+            vega = S * df_q * pdf_d1 * sqrt_T / 100
+            decay = S * df_q * pdf_d1 * sigma / (2 * sqrt_T)
+            vanna = -df_q * pdf_d1 * d2 / sigma / 100
+            volga = vega * d1 * d2 / sigma / 100
+            drift = df_q * pdf_d1 * (2 * (r - q) * T_pos - d2 * vol_sqrt_T) / (2 * T_pos * vol_sqrt_T)
+
+        expired = T <= 0
+        return {
+            'price': sign * (S * df_q * N_d1 - K * df_r * N_d2),
+            'delta': sign * df_q * N_d1,
+            'gamma': gamma,
+            'vega': vega,
+            'theta': 0.0 if expired else (-decay - sign * r * K * df_r * N_d2 + sign * q * S * df_q * N_d1) / 365,
+            'rho': sign * K * T_pos * df_r * N_d2 / 100,
+            'vanna': vanna,
+            'volga': volga,
+            'charm': 0.0 if expired else (sign * q * df_q * N_d1 - drift) / 365
+        }
+
+    @staticmethod
+    def price_chain(chain):
+        """
+        Price a columnar option chain: a mapping of config field names
+        (underlying_price, strike_price, ...) to scalars or arrays.
+        """
+
+        missing = [field for key, field in CHAIN_FIELDS.items()
+                   if field not in chain and key not in ('q', 'option_type')]
+        if missing:
+            raise ValueError(f"Missing chain columns: {', '.join(missing)}")
+
+        return BlackScholesModel.price_batch(
+            chain['underlying_price'], chain['strike_price'], chain['time_to_maturity'],
+            chain['risk_free_rate'], chain['volatility'], chain.get('dividend_yield', 0),
+            chain.get('option_type', 'call')
+        )
+
+    @staticmethod
+    def geometric_asian_price(S, K, T, r, sigma, q=0, option_type='call', num_steps=252):
+        """
+        Closed-form price of a geometric-average Asian option whose average is
+        taken over num_steps + 1 equally spaced fixings including S0, the same
+        monitoring MonteCarloEngine.price_asian uses. log of the average is
+        normal, so this is Black's formula on its forward and variance.
+        """
+
+        S, K, T, r, sigma, q = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma, q)))
+        call = np.broadcast_to(BlackScholesModel.is_call(option_type), S.shape)
+
+        T_pos = np.maximum(T, 0)
+        mean_log = np.log(S) + (r - q - 0.5 * sigma**2) * T_pos / 2
+        variance = sigma**2 * T_pos * (2 * num_steps + 1) / (6 * (num_steps + 1))
+        std = np.sqrt(variance)
+        forward = np.exp(mean_log + 0.5 * variance)
+        sign = np.where(call, 1.0, -1.0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d1 = np.where(std > 0, (np.log(forward / K) + 0.5 * variance) / std,
+                          np.where(forward > K, np.inf, -np.inf))
+            d2 = np.where(std > 0, d1 - std, d1)
+
+        price = np.exp(-r * T_pos) * sign * (forward * norm_cdf(sign * d1) - K * norm_cdf(sign * d2))
+        return price if price.ndim else float(price)
+
+    @staticmethod
+    def paths_from_shocks(S0, T, r, sigma, q, Z):
+        """
+        Build GBM paths from pre-drawn standard normal shocks Z of shape
+        (num_simulations, num_steps). Log-increments are accumulated in place
+        in the output array, which takes the dtype of Z.
+        """
+
+        num_simulations, num_steps = Z.shape
         dt = T / num_steps
-        paths = np.zeros((num_simulations, num_steps + 1))
-        paths[:, 0] = S0
 
-        for t in range(1, num_steps + 1):
-            Z = np.random.standard_normal(num_simulations)
-            paths[:, t] = paths[:, t-1] * np.exp((r - q - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * Z)
+        paths = np.empty((num_simulations, num_steps + 1), dtype=Z.dtype)
+        paths[:, 0] = 0
+        np.multiply(Z, sigma * np.sqrt(dt), out=paths[:, 1:])
+        paths[:, 1:] += (r - q - 0.5 * sigma**2) * dt
+        np.cumsum(paths, axis=1, out=paths)
+        np.exp(paths, out=paths)
+        paths *= S0
+
+        return paths
+
+    @staticmethod
+    def simulate_paths(S0, T, r, sigma, q, num_simulations, num_steps, rng=None, dtype=np.float64):
+        """
+        Simulate GBM paths, shape (num_simulations, num_steps + 1), drawing
+        every shock in one call. rng is a np.random.Generator (a fresh
+        default_rng() if omitted); dtype may be np.float32 to halve memory.
+        """
+
+        if rng is None:
+            rng = np.random.default_rng()
+
+        Z = rng.standard_normal((num_simulations, num_steps), dtype=dtype)
 
-        return paths
\ No newline at end of file
+        return BlackScholesModel.paths_from_shocks(S0, T, r, sigma, q, Z)
@@ -5,13 +5,10 @@ Implements pricing and Greeks for European call & put options
 under Black-Scholes framework
 """
 
-from .option import Option
-import numpy as np
 from .black_scholes import BlackScholesModel
-from scipy.stats import norm
 
 
-class EuropeanOption(Option):
+class EuropeanOption:
     """ 
     Represents a European-style option with Black-Scholes pricing.
     
@@ -37,81 +34,63 @@ class EuropeanOption(Option):
     """
 
     def __init__(self, S, K, T, r, sigma, q=0, option_type='call', num_simulations=10000, num_steps=252):
-        # Initialise parent Option attributes
-        super().__init__(S, K, T, r, sigma, q, option_type, num_simulations, num_steps)
-        # Create Black-Scholes model instance for analytical pricing
-        self.bs_model = BlackScholesModel(self.S, self.K, self.T, self.r, self.sigma, self.q)
-        # Compute d1 & d2 (used repeatedly for price & Greeks)
-        self.d1 = self.bs_model.d1()
-        self.d2 = self.bs_model.d2()
-    
+        self.S = S
+        self.K = K
+        self.T = T
+        self.r = r
+        self.sigma = sigma
+        self.q = q
+        self.option_type = option_type.lower()
+        self.num_simulations = num_simulations
+        self.num_steps = num_steps
+        self._results = None
+
+    def price_and_greeks(self):
+        """Price with first- and second-order Greeks, all from one fused evaluation"""
+
+        if self._results is None:
+            self._results = BlackScholesModel.price_and_greeks(self.S, self.K, self.T, self.r, self.sigma, self.q,
+                                                               self.option_type)
+        return self._results
+
     def price(self):
-       """Return analytical price using Black-Scholes model"""
-       if self.option_type == 'call':
-           return self.bs_model.call_price()
-       else:
-           return self.bs_model.put_price()
+        """Return analytical price using Black-Scholes model"""
+        return self.price_and_greeks()['price']
 
     def delta(self):
         """Sensitivity of option value to underlying price (∂V/∂S)"""
-
-        if self.option_type == 'call':
-            return norm.cdf(self.d1) * np.exp(-self.q * self.T)
-        else:
-            return (norm.cdf(self.d1) - 1) * np.exp(-self.q * self.T)
+        return self.price_and_greeks()['delta']
 
     def gamma(self):
         """Second derivative wrt price - curvature of option value"""
-
-        if self.T <= 0:
-            return 0
-        
-        # Same for call & put
-        return (norm.pdf(self.d1) * np.exp(-self.q * self.T)) / (self.S * self.sigma * np.sqrt(self.T))
+        return self.price_and_greeks()['gamma']
 
     def vega(self):
         """Sensitivity to volatility (∂V/∂σ), expressed per 1% change"""
-
-        if self.T <= 0:
-            return 0
-
-        return self.S * norm.pdf(self.d1) * np.sqrt(self.T) * np.exp(-self.q * self.T) / 100
+        return self.price_and_greeks()['vega']
 
     def theta(self):
         """Time decay (∂V/∂t), per day"""
-
-        if self.T <= 0:
-            return 0
-
-        if self.option_type == 'call':
-            theta = (-(self.S * norm.pdf(self.d1) * self.sigma * np.exp(-self.q * self.T)) / (2 * np.sqrt(self.T))
-                    - self.r * self.K * np.exp(-self.r * self.T) * norm.cdf(self.d2)
-                    + self.q * self.S * np.exp(-self.q * self.T) * norm.cdf(self.d1))
-        else:
-            theta = (-(self.S * norm.pdf(self.d1) * self.sigma * np.exp(-self.q * self.T)) / (2 * np.sqrt(self.T))
-                    + self.r * self.K * np.exp(-self.r * self.T) * norm.cdf(-self.d2)
-                    - self.q * self.S * np.exp(-self.q * self.T) * norm.cdf(-self.d1))
-
-        return theta / 365 # convert annualised theta to per-day
+        return self.price_and_greeks()['theta']
 
     def rho(self):
         """Sensitivity to interest rate (∂V/∂r), expressed per 1% change"""
+        return self.price_and_greeks()['rho']
+
+    def vanna(self):
+        """Sensitivity of delta to volatility (∂²V/∂S∂σ), per 1% change"""
+        return self.price_and_greeks()['vanna']
 
-        if self.T <= 0:
-            return 0
+    def volga(self):
+        """Sensitivity of vega to volatility (∂²V/∂σ²), per 1% change of each"""
+        return self.price_and_greeks()['volga']
 
-        if self.option_type == 'call':
-            return self.K * self.T * np.exp(-self.r * self.T) * norm.cdf(self.d2) / 100
-        else:
-            return -self.K * self.T * np.exp(-self.r * self.T) * norm.cdf(-self.d2) / 100
+    def charm(self):
+        """Delta decay (∂Δ/∂t), per day"""
+        return self.price_and_greeks()['charm']
 
     def get_all_greeks(self):
         """Returns all major Greeks as dictionary"""
 
-        return {
-            'delta': self.delta(),
-            'gamma': self.gamma(),
-            'vega': self.vega(),
-            'theta': self.theta(),
-            'rho': self.rho()
-        }
\ No newline at end of file
+        results = self.price_and_greeks()
+        return {name: results[name] for name in ('delta', 'gamma', 'vega', 'theta', 'rho')}
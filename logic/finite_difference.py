@@ -0,0 +1,328 @@
+import numpy as np
+from scipy.linalg.lapack import dgtsv, dgttrf, dgttrs
+from .black_scholes import BlackScholesModel
+from .barrier_analytic import _barrier_index
+
+
+# spot grids span this many standard deviations of log spot beyond spot and strike,
+# with extra nodes within about GRID_WIDTH standard deviations of strike and barrier
+NUM_STD = 4.0
+GRID_WEIGHT = 4.0
+GRID_WIDTH = 0.4
+
+# weight of the early-exercise penalty term (Forsyth & Vetzal)
+PENALTY = 1e8
+MAX_PENALTY_ITERATIONS = 20
+
+
+def stretched_grid(lo, hi, centres, width, fixed, num_points):
+    """
+    num_points + 1 spot nodes from lo to hi per row, packed in log spot
+    around each column of centres (nan where a row has none): node density
+    is 1 + GRID_WEIGHT / (1 + (log(S / c) / (GRID_WIDTH * width))^2) per
+    centre c, with width the standard deviation of log spot.
+
+    Each column of fixed (nan for none) lands exactly on a node, by
+    stretching the density piecewise between them. Returns the nodes and
+    the node index of every fixed value.
+    """
+
+    u = np.linspace(0.0, 1.0, 16 * num_points + 1)
+    fine = np.log(lo)[:, None] + np.log(hi / lo)[:, None] * u
+    density = np.ones_like(fine)
+    for centre in centres.T:
+        term = GRID_WEIGHT / (1 + ((fine - np.log(centre)[:, None]) / (GRID_WIDTH * width[:, None])) ** 2)
+        density += np.where(np.isnan(centre)[:, None], 0.0, term)
+
+    mass = np.cumsum(0.5 * (density[:, 1:] + density[:, :-1]) * np.diff(fine, axis=1), axis=1)
+    mass = np.concatenate([np.zeros((len(lo), 1)), mass / mass[:, -1:]], axis=1)
+
+    nodes = np.empty((len(lo), num_points + 1))
+    index = np.zeros(fixed.shape, dtype=int)
+    steps = np.arange(num_points + 1)
+    for row, (m, f, points) in enumerate(zip(mass, fine, fixed)):
+        order = np.flatnonzero(~np.isnan(points))
+        order = order[np.argsort(points[order])]
+        fixed_mass = np.interp(np.log(points[order]), f, m)
+
+        # nearest distinct interior node for each fixed point, then invert the mass through them
+        k = np.clip(np.rint(fixed_mass * num_points).astype(int), 1, num_points - 1)
+        for i in range(1, len(k)):
+            k[i] = max(k[i], k[i - 1] + 1)
+        index[row, order] = k
+
+        levels = np.interp(steps, np.concatenate([[0], k, [num_points]]), np.concatenate([[0.0], fixed_mass, [1.0]]))
+        nodes[row] = np.exp(np.interp(levels, m, f))
+        nodes[row, k] = points[order]
+
+    nodes[:, 0], nodes[:, -1] = lo, hi
+    return nodes, index
+
+
+class FiniteDifferenceEngine:
+    """
+    Crank-Nicolson finite-difference solver of the Black-Scholes PDE for
+    American and single-barrier options.
+
+    Each option gets a non-uniform spot grid of grid_points intervals packed
+    around the strike and barrier, with the spot itself a node. Time runs in
+    num_steps Crank-Nicolson steps; the first rannacher_steps (and the first
+    after every discrete barrier date) are each replaced by two implicit
+    Euler half-steps to damp the payoff kink. Early exercise is imposed with
+    the penalty method, a few tridiagonal solves per step.
+
+    Options are solved together: every option's tridiagonal system is one
+    block of a single tridiagonal matrix, so each step is one LAPACK solve
+    for the whole batch (factored once up front when there is no early
+    exercise). Greeks use the same units as AmericanOption: vega
+    and rho per 1%, theta per year. Delta, gamma and theta are read off the
+    grid; vega and rho come from bumped sigma / r scenarios solved in the
+    same batch.
+    """
+
+    def __init__(self, num_steps=252, grid_points=200, rannacher_steps=2):
+        if grid_points < 4:
+            raise ValueError("grid_points must be at least 4")
+
+        self.num_steps = max(int(num_steps), 1)
+        self.grid_points = int(grid_points)
+        self.rannacher_steps = int(rannacher_steps)
+
+    def price_american(self, S0, K, T, r, sigma, q, option_type):
+        return float(self.price_batch(S0, K, T, r, sigma, q, option_type, compute_greeks=False)['price'])
+
+    def price_batch(self, S, K, T, r, sigma, q=0, option_type='call', american=True, compute_greeks=True, bump=0.01):
+        """
+        Price (and Greeks) for arrays of vanilla options, broadcast together.
+
+        Returns dict of arrays: price and, with compute_greeks, delta, gamma,
+        vega, theta, rho
+        """
+
+        S, K, T, r, sigma, q = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma, q)))
+        call = np.broadcast_to(BlackScholesModel.is_call(option_type), S.shape)
+        shape = S.shape
+        rows = [x.ravel() for x in (S, K, T, r, sigma, q, call)]
+
+        def solve(S, K, T, r, sigma, q, call):
+            none = np.full(S.shape, np.nan)
+            results = self._solve(S, K, T, r, sigma, q, call, american, none, np.zeros(S.shape), np.zeros(S.shape),
+                                  np.zeros(S.shape, dtype=bool), None)
+            return results, self._at_expiry(S, K, call)
+
+        return self._with_greeks(solve, rows, shape, compute_greeks, bump)
+
+    def price_barrier(self, S0, K, T, r, sigma, q, option_type, barrier_type, barrier_level, rebate=0.0,
+                      monitoring_points=None):
+        return float(self.barrier_batch(S0, K, T, r, sigma, q, option_type, barrier_type, barrier_level, rebate,
+                                        monitoring_points, compute_greeks=False)['price'])
+
+    def barrier_batch(self, S, K, T, r, sigma, q, option_type, barrier_type, barrier_level, rebate=0.0,
+                      monitoring_points=None, compute_greeks=True, bump=0.01):
+        """
+        Price (and Greeks) for arrays of barrier options, broadcast together,
+        with the Reiner-Rubinstein rebate conventions. The barrier is
+        continuous unless monitoring_points is given, in which case it is
+        checked at that many equally spaced dates up to expiry.
+
+        Out-options are solved directly; in-options as the Black-Scholes
+        vanilla minus an out-option paying payoff - rebate.
+        """
+
+        S, K, T, r, sigma, q, H, R = np.broadcast_arrays(
+            *(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma, q, barrier_level, rebate)))
+        shape = S.shape
+        call = np.broadcast_to(BlackScholesModel.is_call(option_type), shape)
+        index = np.broadcast_to(_barrier_index(barrier_type), shape)
+        rows = [x.ravel() for x in (S, K, T, r, sigma, q, call, H, R, index)]
+
+        def solve(S, K, T, r, sigma, q, call, H, R, index):
+            knock_in = index < 2
+            down = (index == 0) | (index == 2)
+            results = self._solve(S, K, T, r, sigma, q, call, False, H, np.where(knock_in, 0.0, R),
+                                  np.where(knock_in, -R, 0.0), down, monitoring_points)
+
+            if np.any(knock_in):
+                vanilla = BlackScholesModel.price_batch(S, K, T, r, sigma, q, call)
+                vanilla['theta'] = vanilla['theta'] * 365
+                for name, value in results.items():
+                    results[name] = np.where(knock_in, vanilla[name] - value, value)
+
+            at_expiry = self._at_expiry(S, K, call)
+            at_expiry = {name: np.where(knock_in, 0.0, value) for name, value in at_expiry.items()}
+            at_expiry['price'] = np.where(knock_in, R, at_expiry['price'])
+            return results, at_expiry
+
+        return self._with_greeks(solve, rows, shape, compute_greeks, bump)
+
+    @staticmethod
+    def _at_expiry(S, K, call):
+        return {
+            'price': np.where(call, np.maximum(S - K, 0), np.maximum(K - S, 0)),
+            'delta': np.where(call, 1.0 * (S > K), -1.0 * (S < K)),
+            'gamma': np.zeros_like(S),
+            'theta': np.zeros_like(S)
+        }
+
+    def _with_greeks(self, solve, rows, shape, compute_greeks, bump):
+
+        S, K, T, r, sigma = rows[:5]
+        expired = T <= 0
+        rows[2] = np.where(expired, 1.0, T)
+
+        if compute_greeks:
+            # vega and rho scenarios ride along in the same banded solve
+            n = len(S)
+            stacked = [np.tile(x, 5) for x in rows]
+            stacked[4] = np.concatenate([sigma, sigma + bump, np.maximum(sigma - bump, 1e-8), sigma, sigma])
+            stacked[3] = np.concatenate([r, r, r, r + bump, r - bump])
+            results, at_expiry = solve(*stacked)
+
+            prices = results['price'].reshape(5, n)
+            results = {name: value[:n] for name, value in results.items()}
+            results['vega'] = (prices[1] - prices[2]) / (2 * bump) / 100
+            results['rho'] = (prices[3] - prices[4]) / (2 * bump) / 100
+            at_expiry = {name: value[:n] for name, value in at_expiry.items()}
+            at_expiry['vega'] = at_expiry['rho'] = np.zeros(n)
+        else:
+            results, at_expiry = solve(*rows)
+            results = {'price': results['price']}
+
+        return {name: np.where(expired, at_expiry[name], value).reshape(shape) for name, value in results.items()}
+
+    def _solve(self, S, K, T, r, sigma, q, call, american, H, rebate, shift, down, monitoring_points):
+        """
+        March every row from expiry to today. Rows with a barrier H knock out
+        to rebate at it (at monitoring_points dates, or continuously), and
+        every payoff is shifted by the constant shift.
+        """
+
+        n, M = len(S), self.grid_points
+        rows = np.arange(n)
+        barrier = ~np.isnan(H)
+        discrete = barrier & (monitoring_points is not None)
+        continuous = barrier & ~discrete
+        sign = np.where(call, 1.0, -1.0)
+
+        # spot range, ending at a continuous barrier
+        spread = np.exp(NUM_STD * sigma * np.sqrt(T))
+        lo = np.minimum(S, K) / spread
+        hi = np.maximum(S, K) * spread
+        lo = np.where(discrete & down, np.minimum(lo, H / spread), np.where(continuous & down, H, lo))
+        hi = np.where(discrete & ~down, np.maximum(hi, H * spread), np.where(continuous & ~down, H, hi))
+
+        # spot (and a discrete barrier) on a node, extra nodes around strike and barrier
+        x, fixed_index = stretched_grid(lo, hi, np.stack([K, H], axis=1), sigma * np.sqrt(T),
+                                        np.stack([S, np.where(discrete, H, np.nan)], axis=1), M)
+        spot_index, taken = fixed_index.T
+
+        # Black-Scholes operator on the non-uniform grid, interior nodes
+        h = np.diff(x, axis=1)
+        h_down, h_up = h[:, :-1], h[:, 1:]
+        alpha = 0.5 * (sigma[:, None] * x[:, 1:-1]) ** 2
+        beta = (r - q)[:, None] * x[:, 1:-1]
+        lower = (2 * alpha - beta * h_up) / (h_down * (h_down + h_up))
+        upper = (2 * alpha + beta * h_down) / (h_up * (h_down + h_up))
+        diag = -(2 * alpha - beta * (h_up - h_down)) / (h_down * h_up) - r[:, None]
+
+        def apply(V, weight):
+            out = V.copy()
+            out[:, 1:-1] += weight[:, None] * (lower * V[:, :-2] + diag * V[:, 1:-1] + upper * V[:, 2:])
+            return out
+
+        # knock-out dates: every step when continuous, else every per_date steps
+        num_steps = self.num_steps
+        per_date = None
+        if monitoring_points is not None:
+            per_date = -(-num_steps // monitoring_points)
+            num_steps = per_date * monitoring_points
+        dt = T / num_steps
+
+        # (I - dt/2 L) is the system matrix of both Crank-Nicolson and the half-step implicit Euler
+        half = 0.5 * dt
+        bands = np.zeros((3, n, M + 1))
+        bands[1] = 1.0
+        bands[0, :, 2:] = -half[:, None] * upper
+        bands[1, :, 1:-1] -= half[:, None] * diag
+        bands[2, :, :-2] = -half[:, None] * lower
+        bands = bands.reshape(3, -1)
+
+        intrinsic = np.maximum(sign[:, None] * (x - K[:, None]), 0)
+        knocked = np.zeros(x.shape, dtype=bool)
+        on_barrier = np.zeros(x.shape, dtype=bool)
+        if np.any(discrete):
+            knocked[discrete] = np.where(down[discrete, None], x[discrete] < H[discrete, None],
+                                         x[discrete] > H[discrete, None])
+            on_barrier[rows[discrete], taken[discrete]] = True
+
+        def knock_out(V):
+            # at a monitoring date; the node on the barrier takes the mean of both sides
+            V[knocked] = np.broadcast_to(rebate[:, None], V.shape)[knocked]
+            V[on_barrier] = 0.5 * (V[on_barrier] + rebate[on_barrier.any(axis=1)])
+            return V
+
+        def boundaries(V, tau):
+            # far ends follow the discounted forward payoff; barrier ends pay the rebate
+            for end, knock_end in ((0, down & barrier), (-1, ~down & barrier)):
+                far = np.maximum(sign * (x[:, end] * np.exp(-q * tau) - K * np.exp(-r * tau)), 0)
+                far += shift * np.exp(-r * tau)
+                if american:
+                    far = np.maximum(far, intrinsic[:, end])
+                V[:, end] = np.where(knock_end, rebate, far)
+            return V
+
+        if not american:
+            # the matrix never changes: factor it once
+            factors = dgttrf(bands[2, :-1], bands[1], bands[0, 1:])[:5]
+
+        def solve(rhs, previous):
+            if not american:
+                return dgttrs(*factors, rhs.ravel())[0].reshape(n, M + 1)
+
+            # penalty iteration: nodes below the exercise value are pinned to it
+            V, active = previous, None
+            for _ in range(MAX_PENALTY_ITERATIONS):
+                exercise = V < intrinsic
+                exercise[:, [0, -1]] = False
+                if active is not None and np.array_equal(exercise, active):
+                    break
+                active = exercise
+                V = dgtsv(bands[2, :-1], bands[1] + PENALTY * active.ravel(), bands[0, 1:],
+                          (rhs + PENALTY * active * intrinsic).ravel())[3].reshape(n, M + 1)
+            return V
+
+        V = intrinsic + shift[:, None]
+        V = boundaries(V, np.zeros(n))
+        if np.any(discrete):
+            V = knock_out(V)
+
+        smoothing = self.rannacher_steps
+        previous = V
+        for step in range(1, num_steps + 1):
+            previous = V
+            tau = step * dt
+            if smoothing > 0:
+                # two implicit Euler half-steps
+                V = solve(boundaries(V.copy(), tau - half), V)
+                V = solve(boundaries(V.copy(), tau), V)
+                smoothing -= 1
+            else:
+                V = solve(boundaries(apply(V, half), tau), V)
+
+            if per_date is not None and step % per_date == 0 and step < num_steps:
+                V = knock_out(V)
+                smoothing = self.rannacher_steps
+
+        # delta and gamma from the three-point stencil around the spot node
+        j = spot_index
+        h_down = x[rows, j] - x[rows, j - 1]
+        h_up = x[rows, j + 1] - x[rows, j]
+        slope_down = (V[rows, j] - V[rows, j - 1]) / h_down
+        slope_up = (V[rows, j + 1] - V[rows, j]) / h_up
+
+        return {
+            'price': V[rows, j],
+            'delta': (slope_down * h_up + slope_up * h_down) / (h_down + h_up),
+            'gamma': 2 * (slope_up - slope_down) / (h_down + h_up),
+            'theta': (previous[rows, j] - V[rows, j]) / dt
+        }
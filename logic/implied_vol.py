@@ -0,0 +1,146 @@
+import numpy as np
+from scipy.special import ndtr, ndtri
+from .black_scholes import BlackScholesModel, CHAIN_FIELDS
+
+
+_INV_SQRT_2PI = 1 / np.sqrt(2 * np.pi)
+
+
+def _normalised_black(x, v):
+    """
+    Out-of-the-money Black value divided by sqrt(F K), for log-moneyness
+    x = log(F / K) and total volatility v = sigma sqrt(T): a call for x <= 0,
+    a put for x > 0. Returns the value and its first two derivatives in v.
+    """
+
+    theta = np.where(x > 0, -1.0, 1.0)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        d1 = x / v + 0.5 * v
+        d2 = d1 - v
+        value = theta * (np.exp(0.5 * x) * ndtr(theta * d1) - np.exp(-0.5 * x) * ndtr(theta * d2))
+        slope = _INV_SQRT_2PI * np.exp(-0.5 * (x / v) ** 2 - 0.125 * v ** 2)
+        curvature = slope * (x ** 2 / v ** 3 - 0.25 * v)
+    return value, slope, curvature
+
+
+def implied_volatility(price, S, K, T, r, q=0, option_type='call', tol=1e-10, max_iter=50):
+    """
+    Black-Scholes implied volatility of every quote at once; all inputs,
+    option_type included, broadcast together.
+
+    Quotes are reduced by put-call parity to out-of-the-money time value in
+    units of sqrt(F K), whose logarithm is concave in total volatility. Halley
+    steps on it start from the exact at-the-money inverse or the inflection
+    point sqrt(2 |log(F/K)|), and fall back to bisection whenever they would
+    leave the bracket known to hold the root.
+
+    Returns dict of arrays: volatility (nan where the price is outside the
+    no-arbitrage bounds or T <= 0), converged, iterations
+    """
+
+    price, S, K, T, r, q = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (price, S, K, T, r, q)))
+    call = np.broadcast_to(BlackScholesModel.is_call(option_type), S.shape)
+    shape = S.shape
+    price, S, K, T, r, q, call = (np.ravel(x) for x in (price, S, K, T, r, q, call))
+
+    volatility = np.full(S.shape, np.nan)
+    converged = np.zeros(S.shape, dtype=bool)
+    iterations = np.zeros(S.shape, dtype=int)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        forward = S * np.exp((r - q) * T)
+        undiscounted = price * np.exp(r * T)
+        x = np.log(forward / K)
+
+        # out-of-the-money time value, by put-call parity where needed
+        call_value = np.where(call, undiscounted, undiscounted + forward - K)
+        otm_value = np.where(x > 0, call_value - (forward - K), call_value)
+        beta = otm_value / np.sqrt(forward * K)
+        upper = np.exp(-0.5 * np.abs(x))
+
+    # at intrinsic value the only solution is zero; in-the-money quotes lose
+    # their time value to rounding when the intrinsic value is subtracted
+    in_the_money = np.where(call, x > 0, x < 0)
+    rounding = np.where(in_the_money, 1e-13 * np.abs(forward - K) / np.sqrt(forward * K), 0.0)
+    valid = (T > 0) & (beta >= -rounding) & (beta < upper) & np.isfinite(beta)
+    intrinsic = valid & (beta <= rounding)
+    volatility[intrinsic] = 0.0
+    converged[intrinsic] = True
+
+    todo = np.flatnonzero(valid & ~intrinsic)
+    if todo.size == 0:
+        return {name: value.reshape(shape) for name, value in
+                (('volatility', volatility), ('converged', converged), ('iterations', iterations))}
+
+    x, beta = x[todo], beta[todo]
+    log_beta = np.log(beta)
+    lo = np.zeros(todo.size)
+    hi = np.full(todo.size, np.inf)
+
+    # ATM inverts exactly; elsewhere start at the inflection point of b(v)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        v = np.where(x == 0, 2 * ndtri(0.5 * (beta + 1)), np.sqrt(2 * np.abs(x)))
+    v = np.where(np.isfinite(v) & (v > 0), v, 1.0)
+
+    active = np.arange(todo.size)
+    done = np.zeros(todo.size, dtype=bool)
+    steps = np.zeros(todo.size, dtype=int)
+
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+
+        xa, va = x[active], v[active]
+        value, slope, curvature = _normalised_black(xa, va)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            residual = np.log(value) - log_beta[active]
+            # derivatives of log b(v)
+            g1 = slope / value
+            g2 = curvature / value - g1 ** 2
+            newton = residual / g1
+            step = newton / np.maximum(1 - 0.5 * newton * g2 / g1, 0.5)
+
+        # b increases with v: shrink the bracket around the root
+        above = residual > 0
+        hi[active] = np.where(above, np.minimum(hi[active], va), hi[active])
+        lo[active] = np.where(above, lo[active], np.maximum(lo[active], va))
+
+        candidate = va - step
+        a_lo, a_hi = lo[active], hi[active]
+        inside = np.isfinite(candidate) & (candidate > a_lo) & (candidate < a_hi)
+        fallback = np.where(np.isfinite(a_hi), 0.5 * (a_lo + a_hi), 2 * va)
+        candidate = np.where(inside, candidate, fallback)
+
+        steps[active] += 1
+        solved = np.abs(residual) <= tol
+        finished = solved | (np.abs(candidate - va) <= tol * np.maximum(va, 1.0))
+        v[active] = np.where(solved, va, candidate)
+        done[active] = finished
+        active = active[~finished]
+
+    volatility[todo] = v / np.sqrt(T[todo])
+    converged[todo] = done
+    iterations[todo] = steps
+
+    return {name: value.reshape(shape) for name, value in
+            (('volatility', volatility), ('converged', converged), ('iterations', iterations))}
+
+
+def implied_volatility_chain(chain, price_field='market_price'):
+    """
+    Implied volatilities of a columnar option chain keyed by the config field
+    names used by BlackScholesModel.price_chain, with the quotes under
+    price_field.
+    """
+
+    missing = [field for key, field in CHAIN_FIELDS.items()
+               if field not in chain and key not in ('q', 'option_type', 'sigma')]
+    if price_field not in chain:
+        missing.append(price_field)
+    if missing:
+        raise ValueError(f"Missing chain columns: {', '.join(missing)}")
+
+    return implied_volatility(
+        chain[price_field], chain['underlying_price'], chain['strike_price'], chain['time_to_maturity'],
+        chain['risk_free_rate'], chain.get('dividend_yield', 0), chain.get('option_type', 'call')
+    )
@@ -0,0 +1,208 @@
+import numpy as np
+from .black_scholes import BlackScholesModel
+
+
+LATTICE_METHODS = ('crr', 'leisen-reimer', 'trinomial')
+
+
+def peizer_pratt(z, n):
+    # Peizer-Pratt method 2 inversion used by the Leisen-Reimer tree
+    return 0.5 + np.sign(z) * 0.5 * np.sqrt(1 - np.exp(-(z / (n + 1 / 3 + 0.1 / (n + 1))) ** 2 * (n + 1 / 6)))
+
+
+class LatticeEngine:
+    """
+    Deterministic tree pricer for American (and European) options.
+
+    method: 'crr' (Cox-Ross-Rubinstein binomial), 'leisen-reimer' (binomial
+    centred on the strike, num_steps rounded up to odd) or 'trinomial'.
+    With richardson=True each result is extrapolated from num_steps and
+    roughly num_steps / 2, except the trinomial theta.
+
+    Every method is vectorised over options: each array element gets its own
+    tree, but all of them are rolled back together in one loop over steps.
+    Greeks use the same units as AmericanOption: vega and rho per 1%, theta
+    per year. Delta, gamma and theta are read from the first nodes of the
+    tree; vega and rho come from re-solving with sigma / r bumped.
+    """
+
+    def __init__(self, num_steps=252, method='crr', richardson=False):
+        if method not in LATTICE_METHODS:
+            raise ValueError(f"Unknown lattice method: {method}. Must be one of: {', '.join(LATTICE_METHODS)}")
+
+        self.num_steps = num_steps
+        self.method = method
+        self.richardson = richardson
+
+    def price_american(self, S0, K, T, r, sigma, q, option_type):
+        return float(self.price_batch(S0, K, T, r, sigma, q, option_type, compute_greeks=False)['price'])
+
+    def price_batch(self, S, K, T, r, sigma, q=0, option_type='call', american=True, compute_greeks=True, bump=0.01):
+        """
+        Price (and Greeks) for arrays of options, broadcast together.
+
+        Returns dict of arrays: price and, with compute_greeks, delta, gamma,
+        vega, theta, rho
+        """
+
+        S, K, T, r, sigma, q = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (S, K, T, r, sigma, q)))
+        call = np.broadcast_to(BlackScholesModel.is_call(option_type), S.shape)
+        shape = S.shape
+        rows = [x.ravel() for x in (S, K, T, r, sigma, q, call)]
+
+        results = self._extrapolated(*rows, american)
+
+        if compute_greeks:
+            S, K, T, r, sigma, q, call = rows
+            price_up = self._extrapolated(S, K, T, r, sigma + bump, q, call, american)['price']
+            price_down = self._extrapolated(S, K, T, r, np.maximum(sigma - bump, 1e-8), q, call, american)['price']
+            results['vega'] = (price_up - price_down) / (2 * bump) / 100
+
+            price_up = self._extrapolated(S, K, T, r + bump, sigma, q, call, american)['price']
+            price_down = self._extrapolated(S, K, T, r - bump, sigma, q, call, american)['price']
+            results['rho'] = (price_up - price_down) / (2 * bump) / 100
+        else:
+            results = {'price': results['price']}
+
+        return {name: value.reshape(shape) for name, value in results.items()}
+
+    def _steps(self, num_steps):
+        # the Leisen-Reimer tree is only defined for an odd number of steps
+        if self.method == 'leisen-reimer' and num_steps % 2 == 0:
+            return num_steps + 1
+        return max(num_steps, 2)
+
+    def _extrapolated(self, S, K, T, r, sigma, q, call, american):
+
+        fine_steps = self._steps(self.num_steps)
+        fine = self._solve(S, K, T, r, sigma, q, call, american, fine_steps)
+
+        if not self.richardson:
+            return fine
+
+        coarse_steps = self._steps(self.num_steps // 2)
+        coarse = self._solve(S, K, T, r, sigma, q, call, american, coarse_steps)
+
+        # error ~ 1/N for CRR and trinomial trees, ~ 1/N^2 for Leisen-Reimer
+        order = 2 if self.method == 'leisen-reimer' else 1
+        w_fine = fine_steps ** order
+        w_coarse = coarse_steps ** order
+
+        results = {name: (w_fine * fine[name] - w_coarse * coarse[name]) / (w_fine - w_coarse) for name in fine}
+        if self.method == 'trinomial' and 'theta' in fine:
+            # trinomial thetas do not converge monotonically in N, so extrapolating them adds error
+            results['theta'] = fine['theta']
+        return results
+
+    def _solve(self, S, K, T, r, sigma, q, call, american, num_steps):
+
+        expired = T <= 0
+        T = np.where(expired, 1.0, T)
+
+        if self.method == 'trinomial':
+            results = self._trinomial(S, K, T, r, sigma, q, call, american, num_steps)
+        else:
+            results = self._binomial(S, K, T, r, sigma, q, call, american, num_steps)
+
+        # expired options are worth their intrinsic value
+        intrinsic = np.where(call, np.maximum(S - K, 0), np.maximum(K - S, 0))
+        at_expiry = {
+            'price': intrinsic,
+            'delta': np.where(call, 1.0 * (S > K), -1.0 * (S < K)),
+            'gamma': np.zeros_like(S),
+            'theta': np.zeros_like(S)
+        }
+
+        return {name: np.where(expired, at_expiry[name], value) for name, value in results.items()}
+
+    def _binomial(self, S, K, T, r, sigma, q, call, american, num_steps):
+
+        dt = T / num_steps
+        growth = np.exp((r - q) * dt)
+        disc = np.exp(-r * dt)
+
+        if self.method == 'leisen-reimer':
+            vol_sqrt_T = sigma * np.sqrt(T)
+            d1 = (np.log(S / K) + (r - q + 0.5 * sigma ** 2) * T) / vol_sqrt_T
+            d2 = d1 - vol_sqrt_T
+            p = peizer_pratt(d2, num_steps)
+            u = growth * peizer_pratt(d1, num_steps) / p
+            d = (growth - p * u) / (1 - p)
+        else:
+            u = np.exp(sigma * np.sqrt(dt))
+            d = 1 / u
+            p = (growth - d) / (u - d)
+
+        u, d, p, disc = (x[:, None] for x in (u, d, p, disc))
+        K = K[:, None]
+        sign = np.where(call, 1.0, -1.0)[:, None]
+
+        j = np.arange(num_steps + 1)
+        spot = S[:, None] * u ** j * d ** (num_steps - j)
+        values = np.maximum(sign * (spot - K), 0)
+
+        for i in range(num_steps - 1, -1, -1):
+            spot = spot[:, :i + 1] / d
+            lower = values[:, :-1]
+            values = lower + p * (values[:, 1:] - lower)
+            values *= disc
+            if american:
+                np.maximum(values, sign * (spot - K), out=values)
+
+            if i == 2:
+                spot_2, values_2 = spot, values
+            elif i == 1:
+                spot_1, values_1 = spot, values
+
+        price = values[:, 0]
+        delta = (values_1[:, 1] - values_1[:, 0]) / (spot_1[:, 1] - spot_1[:, 0])
+        gamma = ((values_2[:, 2] - values_2[:, 1]) / (spot_2[:, 2] - spot_2[:, 1])
+                 - (values_2[:, 1] - values_2[:, 0]) / (spot_2[:, 1] - spot_2[:, 0])) / (0.5 * (spot_2[:, 2] - spot_2[:, 0]))
+        # the middle node two steps in sits at S only when u * d = 1 (CRR), so
+        # read the value at S off the quadratic through the three nodes there
+        x0, x1, x2 = (spot_2[:, k] - S for k in range(3))
+        value_at_S = (values_2[:, 0] * x1 * x2 / ((x0 - x1) * (x0 - x2))
+                      + values_2[:, 1] * x0 * x2 / ((x1 - x0) * (x1 - x2))
+                      + values_2[:, 2] * x0 * x1 / ((x2 - x0) * (x2 - x1)))
+        theta = (value_at_S - price) / (2 * dt)
+
+        return {'price': price, 'delta': delta, 'gamma': gamma, 'theta': theta}
+
+    def _trinomial(self, S, K, T, r, sigma, q, call, american, num_steps):
+
+        # Boyle's trinomial tree with u = exp(sigma * sqrt(2 dt)) and a middle branch
+        dt = T / num_steps
+        half_growth = np.exp((r - q) * dt / 2)
+        up = np.exp(sigma * np.sqrt(dt / 2))
+        down = 1 / up
+
+        p_up = ((half_growth - down) / (up - down)) ** 2
+        p_down = ((up - half_growth) / (up - down)) ** 2
+        p_mid = 1 - p_up - p_down
+        u = up ** 2
+        disc = np.exp(-r * dt)
+
+        u, p_up, p_mid, p_down, disc = (x[:, None] for x in (u, p_up * disc, p_mid * disc, p_down * disc, disc))
+        K = K[:, None]
+        sign = np.where(call, 1.0, -1.0)[:, None]
+
+        k = np.arange(2 * num_steps + 1)
+        spot = S[:, None] * u ** (k - num_steps)
+        values = np.maximum(sign * (spot - K), 0)
+
+        for i in range(num_steps - 1, -1, -1):
+            spot = spot[:, 1:-1]
+            values = p_up * values[:, 2:] + p_mid * values[:, 1:-1] + p_down * values[:, :-2]
+            if american:
+                np.maximum(values, sign * (spot - K), out=values)
+
+            if i == 1:
+                spot_1, values_1 = spot, values
+
+        price = values[:, 0]
+        delta = (values_1[:, 2] - values_1[:, 0]) / (spot_1[:, 2] - spot_1[:, 0])
+        gamma = ((values_1[:, 2] - values_1[:, 1]) / (spot_1[:, 2] - spot_1[:, 1])
+                 - (values_1[:, 1] - values_1[:, 0]) / (spot_1[:, 1] - spot_1[:, 0])) / (0.5 * (spot_1[:, 2] - spot_1[:, 0]))
+        theta = (values_1[:, 1] - price) / dt
+
+        return {'price': price, 'delta': delta, 'gamma': gamma, 'theta': theta}
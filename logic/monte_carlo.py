@@ -1,110 +1,1332 @@
+import os
+import copy
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from .black_scholes import BlackScholesModel
+from .barrier_analytic import BGK_BETA, discrete_barrier_shift
+
+
+class PayoffStatistics:
+    """Online accumulator (count, sum, sum of squares) for simulated payoffs"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def add(self, payoffs):
+        payoffs = np.asarray(payoffs, dtype=np.float64)
+        self.count += payoffs.size
+        self.total += float(np.sum(payoffs))
+        self.total_sq += float(np.dot(payoffs, payoffs))
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std_error(self):
+        if self.count < 2:
+            return float('inf')
+        variance = (self.total_sq - self.count * self.mean ** 2) / (self.count - 1)
+        return np.sqrt(max(variance, 0.0) / self.count)
+
+
+class ControlVariateStatistics:
+    """
+    Online accumulator for payoffs X paired with a control Y of known mean.
+    The estimate is mean(X) - b * (mean(Y) - control_mean) with the
+    variance-minimising b = cov(X, Y) / var(Y) taken from the same sample.
+    """
+
+    def __init__(self, control_mean):
+        self.control_mean = control_mean
+        self.count = 0
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+        self.sum_xx = 0.0
+        self.sum_yy = 0.0
+        self.sum_xy = 0.0
+
+    def add(self, payoffs, controls):
+        payoffs = np.asarray(payoffs, dtype=np.float64)
+        controls = np.asarray(controls, dtype=np.float64)
+        self.count += payoffs.size
+        self.sum_x += float(np.sum(payoffs))
+        self.sum_y += float(np.sum(controls))
+        self.sum_xx += float(np.dot(payoffs, payoffs))
+        self.sum_yy += float(np.dot(controls, controls))
+        self.sum_xy += float(np.dot(payoffs, controls))
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum_x += other.sum_x
+        self.sum_y += other.sum_y
+        self.sum_xx += other.sum_xx
+        self.sum_yy += other.sum_yy
+        self.sum_xy += other.sum_xy
+
+    def _moments(self):
+        n = self.count
+        mean_x = self.sum_x / n
+        mean_y = self.sum_y / n
+        var_x = (self.sum_xx - n * mean_x**2) / (n - 1)
+        var_y = (self.sum_yy - n * mean_y**2) / (n - 1)
+        cov_xy = (self.sum_xy - n * mean_x * mean_y) / (n - 1)
+        beta = cov_xy / var_y if var_y > 0 else 0.0
+        return mean_x, mean_y, var_x, cov_xy, beta
+
+    @property
+    def mean(self):
+        if self.count < 2:
+            return self.sum_x / self.count if self.count else 0.0
+        mean_x, mean_y, _, _, beta = self._moments()
+        return mean_x - beta * (mean_y - self.control_mean)
+
+    @property
+    def std_error(self):
+        if self.count < 3:
+            return float('inf')
+        _, _, var_x, cov_xy, beta = self._moments()
+        return np.sqrt(max(var_x - beta * cov_xy, 0.0) / self.count)
+
+
+class SensitivityStatistics:
+    """
+    Wraps PayoffStatistics or ControlVariateStatistics for the price and
+    keeps a PayoffStatistics per Greek integrand recorded alongside it, so
+    Greeks are estimated from the same paths as the price.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.greeks = {}
+
+    def add(self, *arrays):
+        self.stats.add(*arrays)
+
+    def add_greeks(self, integrands):
+        for name, values in integrands.items():
+            self.greeks.setdefault(name, PayoffStatistics()).add(values)
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        for name, stats in other.greeks.items():
+            self.greeks.setdefault(name, PayoffStatistics()).merge(stats)
+
+    @property
+    def count(self):
+        return self.stats.count
+
+    @property
+    def mean(self):
+        return self.stats.mean
+
+    @property
+    def std_error(self):
+        return self.stats.std_error
+
+
+class AntitheticStatistics:
+    """
+    Wraps PayoffStatistics, ControlVariateStatistics or SensitivityStatistics
+    for antithetic blocks,
+    whose second half mirrors the first: each path is averaged with its twin
+    before accumulating, so the standard error accounts for the pairing.
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def add(self, *arrays):
+        half = len(arrays[0]) // 2
+        self.stats.add(*(0.5 * (a[:half] + a[half:2 * half]) for a in arrays))
+
+    def add_greeks(self, integrands):
+        half = len(next(iter(integrands.values()))) // 2
+        self.stats.add_greeks({name: 0.5 * (a[:half] + a[half:2 * half]) for name, a in integrands.items()})
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+
+    @property
+    def greeks(self):
+        return self.stats.greeks
+
+    @property
+    def count(self):
+        return 2 * self.stats.count
+
+    @property
+    def mean(self):
+        return self.stats.mean
+
+    @property
+    def std_error(self):
+        return self.stats.std_error
+
+
+class ReplicateStatistics:
+    """
+    Wraps PayoffStatistics, ControlVariateStatistics or SensitivityStatistics
+    for quasi-random blocks, which hold several independently scrambled Sobol
+    sequences one after the other. Points within one sequence are not
+    independent, so each replicate is accumulated apart and the standard
+    error is taken from the spread of their estimates.
+    """
+
+    def __init__(self, stats, replicates):
+        self.replicates = [copy.deepcopy(stats) for _ in range(replicates)]
+
+    def add(self, *arrays):
+        parts = [np.array_split(a, len(self.replicates)) for a in arrays]
+        for replicate, part in zip(self.replicates, zip(*parts)):
+            replicate.add(*part)
+
+    def add_greeks(self, integrands):
+        parts = {name: np.array_split(a, len(self.replicates)) for name, a in integrands.items()}
+        for i, replicate in enumerate(self.replicates):
+            replicate.add_greeks({name: part[i] for name, part in parts.items()})
+
+    def merge(self, other):
+        for replicate, more in zip(self.replicates, other.replicates):
+            replicate.merge(more)
+
+    def pooled(self):
+        stats = copy.deepcopy(self.replicates[0])
+        for replicate in self.replicates[1:]:
+            stats.merge(replicate)
+        return stats
+
+    @property
+    def greeks(self):
+        return self.pooled().greeks
+
+    @property
+    def count(self):
+        return sum(replicate.count for replicate in self.replicates)
+
+    @property
+    def mean(self):
+        return self.pooled().mean
+
+    @property
+    def std_error(self):
+        filled = [replicate for replicate in self.replicates if replicate.count]
+        if len(filled) < 2:
+            return float('inf')
+        weights = np.array([replicate.count for replicate in filled], dtype=np.float64)
+        weights /= weights.sum()
+        means = np.array([replicate.mean for replicate in filled])
+        deviations = means - weights @ means
+        variance = len(filled) / (len(filled) - 1) * float(np.sum((weights * deviations) ** 2))
+        return np.sqrt(variance)
+
+
+def brownian_bridge_schedule(num_steps):
+    """
+    Order in which a Brownian bridge fills W at steps 1..num_steps after the
+    endpoint: (step, left, right, left_weight, right_weight, std) per point,
+    in unit time per step.
+    """
+
+    schedule = []
+    intervals = [(0, num_steps)]
+
+    while intervals:
+        left, right = intervals.pop(0)
+        if right - left < 2:
+            continue
+        mid = (left + right) // 2
+        schedule.append((mid, left, right, (right - mid) / (right - left), (mid - left) / (right - left),
+                         np.sqrt((mid - left) * (right - mid) / (right - left))))
+        intervals.append((left, mid))
+        intervals.append((mid, right))
+
+    return schedule
+
+
+def brownian_bridge_increments(Z):
+    """
+    Turn standard normals Z (num_paths, num_steps), columns in decreasing
+    order of importance, into per-step Brownian increments of unit variance.
+    The first column sets the endpoint, so the best-distributed quasi-random
+    coordinates drive the largest-scale movements of the path.
+    """
+
+    num_paths, num_steps = Z.shape
+    W = np.zeros((num_paths, num_steps + 1), dtype=Z.dtype)
+    W[:, num_steps] = np.sqrt(num_steps) * Z[:, 0]
+
+    for column, (step, left, right, left_weight, right_weight, std) in enumerate(
+            brownian_bridge_schedule(num_steps), 1):
+        W[:, step] = left_weight * W[:, left] + right_weight * W[:, right] + std * Z[:, column]
+
+    return np.diff(W, axis=1)
+
+
+def lsm_basis(x, basis='monomial', degree=2):
+    """Regression basis at moneyness x = S / K, shape (len(x), degree + 1)"""
+
+    x = np.asarray(x, dtype=np.float64)
+    B = np.empty((x.size, degree + 1))
+    B[:, 0] = 1.0
+
+    if basis == 'laguerre':
+        # weighted Laguerre polynomials exp(-x/2) L_n(x), as in Longstaff-Schwartz
+        if degree >= 1:
+            B[:, 1] = 1 - x
+        for n in range(1, degree):
+            B[:, n + 1] = ((2 * n + 1 - x) * B[:, n] - n * B[:, n - 1]) / (n + 1)
+        B *= np.exp(-x / 2)[:, None]
+    else:
+        for n in range(1, degree + 1):
+            B[:, n] = B[:, n - 1] * x
+
+    return B
+
+
+def solve_normal_equations(B, y):
+    """Least-squares coefficients from the small (degree + 1)^2 system B'B c = B'y"""
+
+    A = B.T @ B
+    b = B.T @ y
+
+    try:
+        return np.linalg.solve(A, b)
+    except np.linalg.LinAlgError:
+        return np.linalg.lstsq(A, b, rcond=None)[0]
+
+
+class PathAccumulator:
+    """
+    Online payoff for MonteCarloEngine.simulate_stepwise.
+
+    start() is called once per block, update() with the spot of the paths
+    still alive at every monitoring point (including S0), and payoff() with
+    the terminal spot. alive holds the block indices of those paths, so
+    per-path state can be sized once in start() and indexed with it.
+    update() may return a boolean mask over the alive paths of the ones to
+    keep simulating; dropped paths pay zero.
+
+    statistics() and record() may be overridden to collect more than the
+    payoff, e.g. a control variate.
+    """
+
+    def start(self, num_paths):
+        pass
+
+    def update(self, S, alive):
+        return None
+
+    def payoff(self, S, alive):
+        raise NotImplementedError
+
+    def statistics(self):
+        return PayoffStatistics()
+
+    def record(self, stats, S, alive, num_paths):
+        payoffs = np.zeros(num_paths)
+        payoffs[alive] = self.payoff(S, alive)
+        stats.add(payoffs)
+
+
+def vanilla_payoff(S, K, option_type):
+    if option_type.lower() == 'call':
+        return np.maximum(S - K, 0)
+    return np.maximum(K - S, 0)
+
+
+def vanilla_slope(S, K, option_type):
+    # d payoff / dS, zero at the kink
+    if option_type.lower() == 'call':
+        return 1.0 * (S > K)
+    return -1.0 * (S < K)
+
+
+class PathSensitivities:
+    """
+    Ingredients of the Greeks estimated on the pricing paths themselves.
+
+    Sensitivities are taken with respect to SENSITIVITIES = (log S0, sigma,
+    r, T), with the fixing dates scaling with T. log_spot() gives the
+    pathwise derivatives of log S at a step (one row per parameter), and
+    scores() gives the likelihood-ratio score of one step's shock. growth()
+    and variance() give the log-derivatives of a cash flow carried to expiry
+    at r and of the per-step variance sigma**2 * dt.
+    """
+
+    def __init__(self, S0, T, r, sigma, q, num_steps):
+        self.S0 = S0
+        self.T = T
+        self.r = r
+        self.sigma = sigma
+        self.q = q
+        self.dt = T / num_steps
+        self.vol = sigma * np.sqrt(self.dt)
+        self.drift = (r - q - 0.5 * sigma**2) * self.dt
+
+    def log_spot(self, S, step):
+        t = step * self.dt
+        log_return = np.log(S / self.S0)
+        mu = self.r - self.q
+        return np.stack([
+            np.ones_like(log_return),
+            (log_return - (mu + 0.5 * self.sigma**2) * t) / self.sigma,
+            t + np.zeros_like(log_return),
+            (log_return + (mu - 0.5 * self.sigma**2) * t) / (2 * self.T)
+        ])
+
+    def shock(self, log_return):
+        return (log_return - self.drift) / self.vol
+
+    def scores(self, Z):
+        sqrt_dt = np.sqrt(self.dt)
+        drift = self.r - self.q - 0.5 * self.sigma**2
+        return np.stack([
+            np.zeros_like(Z),
+            (Z**2 - 1) / self.sigma - Z * sqrt_dt,
+            Z * sqrt_dt / self.sigma,
+            (Z**2 - 1) / (2 * self.T) + drift * Z * sqrt_dt / (self.sigma * self.T)
+        ])
+
+    def growth(self, t):
+        t = np.asarray(t, dtype=np.float64)
+        zero = np.zeros_like(t)
+        return np.stack([zero, zero, self.T - t, self.r * (1 - t / self.T)])
+
+    def variance(self):
+        return np.array([0.0, 2 / self.sigma, 0.0, 1 / self.T])
+
+    def first_step_gamma(self, Z1, spot_integrand, correction=0.0):
+        """
+        Mixed estimator of gamma from the pathwise derivative w.r.t. log S0:
+        its likelihood-ratio derivative through the first step's shock, plus
+        correction, the derivative of spot_integrand w.r.t. log S0 with S_1
+        held fixed.
+        """
+        S0 = self.S0
+        return spot_integrand * Z1 / (S0**2 * self.vol) + (correction - spot_integrand) / S0**2
+
+
+class AsianAccumulator(PathAccumulator):
+    """
+    Running sum (arithmetic) or log-sum (geometric) of the monitored prices.
+
+    With a control_mean (the undiscounted closed-form geometric payoff) an
+    arithmetic Asian also tracks the log-sum and uses the geometric payoff
+    as a control variate.
+
+    With sensitivities (a PathSensitivities) an arithmetic Asian also records
+    pathwise Greek integrands: the payoff slope times the derivative of the
+    average. Gamma uses the first step's likelihood ratio, corrected for S0
+    being one of the fixings.
+    """
+
+    def __init__(self, K, option_type, average_type='arithmetic', num_steps=252, control_mean=None,
+                 sensitivities=None):
+        self.K = K
+        self.option_type = option_type
+        self.geometric = average_type == 'geometric'
+        self.num_points = num_steps + 1
+        self.control_mean = None if self.geometric else control_mean
+        self.sensitivities = None if self.geometric else sensitivities
+
+    def start(self, num_paths):
+        self.total = np.zeros(num_paths)
+        if self.control_mean is not None:
+            self.log_total = np.zeros(num_paths)
+        if self.sensitivities is not None:
+            # sum over fixings of S * d log S / d(parameter)
+            self.weighted = np.zeros((4, num_paths))
+            self.first_shock = np.zeros(num_paths)
+            self.step = 0
+
+    def update(self, S, alive):
+        if self.geometric:
+            self.total += np.log(S)
+        else:
+            self.total += S
+            if self.control_mean is not None:
+                self.log_total += np.log(S)
+
+        if self.sensitivities is not None:
+            self.weighted += S * self.sensitivities.log_spot(S, self.step)
+            if self.step == 1:
+                self.first_shock = self.sensitivities.shock(np.log(S / self.sensitivities.S0))
+            self.step += 1
+        return None
+
+    def payoff(self, S, alive):
+        avg_prices = self.total / self.num_points
+        if self.geometric:
+            avg_prices = np.exp(avg_prices)
+        return vanilla_payoff(avg_prices, self.K, self.option_type)
+
+    def greek_integrands(self):
+        model = self.sensitivities
+        S0 = model.S0
+        average = self.total / self.num_points
+        slope = vanilla_slope(average, self.K, self.option_type)
+        derivatives = slope * self.weighted / self.num_points
+
+        # with S_1.. held fixed only the S0 fixing moves the average; the kink
+        # this puts in the derivative is integrated by parts against S_1
+        later = self.total - S0
+        correction = slope * average * S0 * (1 + self.first_shock / model.vol) / later
+        return {
+            'spot': derivatives[0] / S0,
+            'gamma': model.first_step_gamma(self.first_shock, derivatives[0], correction),
+            'vol': derivatives[1],
+            'rate': derivatives[2],
+            'time': derivatives[3]
+        }
+
+    def statistics(self):
+        stats = PayoffStatistics() if self.control_mean is None else ControlVariateStatistics(self.control_mean)
+        return stats if self.sensitivities is None else SensitivityStatistics(stats)
+
+    def record(self, stats, S, alive, num_paths):
+        # no paths are ever dropped, so alive covers the whole block
+        if self.control_mean is None:
+            stats.add(self.payoff(S, alive))
+        else:
+            controls = vanilla_payoff(np.exp(self.log_total / self.num_points), self.K, self.option_type)
+            stats.add(self.payoff(S, alive), controls)
+
+        if self.sensitivities is not None:
+            stats.add_greeks(self.greek_integrands())
+
+
+class BarrierAccumulator(PathAccumulator):
+    """
+    Probability per path that the barrier has not been hit yet (survival);
+    paths that certainly knocked out are dropped straight away.
+
+    With bridge_variance (sigma**2 * dt) set, the barrier is monitored
+    continuously: between two steps a path also crosses with the Brownian
+    bridge probability exp(-2 log(H/S_prev) log(H/S) / (sigma**2 dt)),
+    which weights the payoff instead of being sampled. Without it the
+    barrier is checked at every monitor_every-th step only.
+
+    rebate is paid at expiry to in-options that never knock in, and at the
+    hit to out-options: rebate_growth[i] carries a rebate paid at monitoring
+    point i forward to expiry, so the usual terminal discount prices it.
+
+    With sensitivities (a PathSensitivities) Greek integrands are recorded
+    too. The bridge-weighted payoff is smooth in the path, so they are
+    pathwise (barrier_tangents: d log H / d parameter, for a shifted
+    barrier); checked only at the steps it is not, so they are
+    likelihood ratios of the step shocks.
+    """
+
+    def __init__(self, K, option_type, barrier_type, barrier_level, rebate=0.0, rebate_growth=None,
+                 bridge_variance=None, monitor_every=1, sensitivities=None, barrier_tangents=None):
+        if barrier_type not in ('up-and-out', 'up-and-in', 'down-and-out', 'down-and-in'):
+            raise ValueError(f"Unknown barrier type: {barrier_type}")
+
+        self.K = K
+        self.option_type = option_type
+        self.up = barrier_type.startswith('up')
+        self.knock_out = barrier_type.endswith('out')
+        self.barrier_level = barrier_level
+        self.rebate = rebate
+        self.rebate_growth = rebate_growth
+        self.bridge_variance = bridge_variance
+        self.monitor_every = monitor_every
+        self.sensitivities = sensitivities
+        self.barrier_tangents = np.zeros(4) if barrier_tangents is None else np.asarray(barrier_tangents)
+
+    def start(self, num_paths):
+        self.survival = np.ones(num_paths)
+        self.rebates = np.zeros(num_paths)
+        self.log_distance = np.zeros(num_paths)
+        self.step = 0
+
+        if self.sensitivities is not None:
+            # rows follow PathSensitivities: log S0, sigma, r, T
+            self.d_survival = np.zeros((4, num_paths))
+            self.d_rebates = np.zeros((4, num_paths))
+            self.tangents = np.zeros((4, num_paths))
+            self.scores = np.zeros((4, num_paths))
+            self.log_spot = np.zeros(num_paths)
+            self.first_shock = np.zeros(num_paths)
+            self.first_crossing = np.zeros(num_paths)
+            self.first_distance = np.zeros(num_paths)
+
+    def _track_shocks(self, S, alive, step):
+        model = self.sensitivities
+        log_spot = np.log(S)
+        if step > 0:
+            Z = model.shock(log_spot - self.log_spot[alive])
+            if step == 1:
+                self.first_shock[alive] = Z
+            if self.bridge_variance is None:
+                self.scores[:, alive] += model.scores(Z)
+        self.log_spot[alive] = log_spot
+
+    def _crossing_tangents(self, S, alive, step, prev_distance, log_distance, crossing):
+        # d p_hit / d parameter for the bridge crossing probability
+        tangents = self.sensitivities.log_spot(S, step)
+        if step > 0:
+            d_distance = self.barrier_tangents[:, None] - tangents
+            d_prev = self.barrier_tangents[:, None] - self.tangents[:, alive]
+            d_log_crossing = (-2 * (d_prev * log_distance + prev_distance * d_distance) / self.bridge_variance
+                              + 2 * prev_distance * log_distance / self.bridge_variance
+                              * self.sensitivities.variance()[:, None])
+            d_hit = crossing * d_log_crossing
+        else:
+            d_hit = np.zeros_like(tangents)
+        self.tangents[:, alive] = tangents
+        return d_hit
+
+    def update(self, S, alive):
+        step = self.step
+        self.step += 1
+
+        if self.sensitivities is not None:
+            self._track_shocks(S, alive, step)
+
+        if self.bridge_variance is None and step % self.monitor_every:
+            return None
+        hit = S >= self.barrier_level if self.up else S <= self.barrier_level
+
+        # probability of knocking at this step, given no knock before
+        d_hit = 0.0
+        if self.bridge_variance is not None:
+            log_distance = np.log(self.barrier_level / S)
+            if step > 0:
+                prev_distance = self.log_distance[alive]
+                crossing = np.exp(-2 * prev_distance * log_distance / self.bridge_variance)
+                p_hit = np.where(hit, 1.0, crossing)
+            else:
+                prev_distance = crossing = None
+                p_hit = hit * 1.0
+            self.log_distance[alive] = log_distance
+
+            if self.sensitivities is not None:
+                d_hit = self._crossing_tangents(S, alive, step, prev_distance, log_distance, crossing)
+                d_hit = np.where(hit, 0.0, d_hit)
+                if step == 1:
+                    self.first_crossing[alive] = p_hit
+                    self.first_distance[alive] = log_distance
+        else:
+            p_hit = hit * 1.0
+
+        survival = self.survival[alive]
+        if self.knock_out and self.rebate:
+            growth = 1.0 if self.rebate_growth is None else self.rebate_growth[step]
+            paid_at = step
+            if self.bridge_variance is not None and step > 0 and self.rebate_growth is not None:
+                # a bridge crossing happens inside the step: pay at its midpoint
+                growth = np.sqrt(growth * self.rebate_growth[step - 1])
+                paid_at = step - 0.5
+            if step == 1:
+                self.first_growth = growth
+            self.rebates[alive] += self.rebate * growth * survival * p_hit
+
+            if self.sensitivities is not None:
+                d_growth = growth * self.sensitivities.growth(paid_at * self.sensitivities.dt)
+                if self.rebate_growth is None:
+                    d_growth = np.zeros(4)
+                self.d_rebates[:, alive] += self.rebate * (
+                    growth * (self.d_survival[:, alive] * p_hit + survival * d_hit)
+                    + d_growth[:, None] * survival * p_hit)
+
+        if self.sensitivities is not None and self.bridge_variance is not None:
+            self.d_survival[:, alive] = self.d_survival[:, alive] * (1 - p_hit) - survival * d_hit
+        self.survival[alive] = survival * (1 - p_hit)
+
+        if self.knock_out:
+            return ~hit
+        return None
+
+    def payoff(self, S, alive):
+        payoffs = vanilla_payoff(S, self.K, self.option_type)
+        survival = self.survival[alive]
+        if self.knock_out:
+            return payoffs * survival
+        return payoffs * (1 - survival) + self.rebate * survival
+
+    def greek_integrands(self, values, S, alive):
+        model = self.sensitivities
+        S0 = model.S0
+        vanilla = vanilla_payoff(S, self.K, self.option_type)
+
+        if self.bridge_variance is None:
+            # likelihood ratios: the payoff times the score of its shocks,
+            # plus the explicit dependence of the rebate growth on r and T
+            Z1 = self.first_shock
+            derivatives = values * self.scores + self.d_rebates
+            derivatives[0] = values * Z1 / model.vol
+            gamma = values * (Z1**2 - 1 - model.vol * Z1) / (S0 * model.vol)**2
+        else:
+            slope = vanilla_slope(S, self.K, self.option_type) * S
+            survival = self.survival[alive]
+            d_survival = self.d_survival[:, alive]
+            derivatives = self.d_rebates.copy()
+            if self.knock_out:
+                derivatives[:, alive] += slope * model.log_spot(S, self.step - 1) * survival + vanilla * d_survival
+            else:
+                derivatives[:, alive] += (slope * model.log_spot(S, self.step - 1) * (1 - survival)
+                                          + (self.rebate - vanilla) * d_survival)
+            gamma = model.first_step_gamma(self.first_shock, derivatives[0],
+                                           self._first_crossing_correction(values, derivatives[0], S, alive))
+
+        return {
+            'spot': derivatives[0] / S0,
+            'gamma': gamma,
+            'vol': derivatives[1],
+            'rate': derivatives[2],
+            'time': derivatives[3]
+        }
+
+    def _first_crossing_correction(self, values, spot_derivative, S, alive):
+        """
+        d(spot_derivative) / d log S0 with S_1 onwards held fixed: only the
+        first step's crossing probability p still moves. The path value is
+        p * C + (1 - p) * W, with C the value of a knock in the first step.
+        """
+
+        if self.knock_out:
+            knocked, d_knocked = self.rebate * getattr(self, 'first_growth', 1.0), 0.0
+        else:
+            knocked = np.zeros_like(values)
+            d_knocked = np.zeros_like(values)
+            knocked[alive] = vanilla_payoff(S, self.K, self.option_type)
+            d_knocked[alive] = vanilla_slope(S, self.K, self.option_type) * S
+
+        p = self.first_crossing
+        distance = self.first_distance
+        start_distance = np.log(self.barrier_level / self.sensitivities.S0)
+        variance = self.bridge_variance
+        d_p = 2 * p * (start_distance + distance) / variance
+
+        # paths sure to cross in the first step do not depend on S0 at all
+        inner = p < 1 - 1e-6
+        remaining = 1 - np.where(inner, p, 0.0)
+        unknocked = (values - p * knocked) / remaining
+        d_unknocked = (spot_derivative - d_p * (knocked - unknocked) - p * d_knocked) / remaining
+
+        d_by_start = (2 * p / variance * (1 - 2 * distance * (start_distance + distance) / variance)
+                      * (knocked - unknocked) - 2 * distance / variance * p * (d_knocked - d_unknocked))
+        return np.where(inner, -d_by_start, 0.0)
+
+    def statistics(self):
+        return PayoffStatistics() if self.sensitivities is None else SensitivityStatistics(PayoffStatistics())
+
+    def record(self, stats, S, alive, num_paths):
+        # knocked-out paths pay their (grown) rebate instead of zero
+        payoffs = self.rebates.copy()
+        payoffs[alive] += self.payoff(S, alive)
+        stats.add(payoffs)
+
+        if self.sensitivities is not None:
+            stats.add_greeks(self.greek_integrands(payoffs, S, alive))
+
+
+SAMPLING_SCHEMES = ('pseudo', 'antithetic', 'sobol')
+# independently scrambled Sobol sequences per block, whose spread gives the standard error
+SOBOL_REPLICATES = 16
+LSM_BASES = ('monomial', 'laguerre')
+GREEK_METHODS = ('pathwise', 'bump')
 
 
 class MonteCarloEngine:
 
-    def __init__(self, num_simulations=10000, num_steps=252, seed=None):
+    def __init__(self, num_simulations=10000, num_steps=252, seed=None, dtype=np.float64, chunk_size=None,
+                 num_workers=1, target_error=None, max_simulations=None, sampling='pseudo',
+                 lsm_basis='monomial', lsm_degree=2, greeks='pathwise'):
+        if sampling not in SAMPLING_SCHEMES:
+            raise ValueError(f"Unknown sampling scheme: {sampling}. Must be one of: {', '.join(SAMPLING_SCHEMES)}")
+        if lsm_basis not in LSM_BASES:
+            raise ValueError(f"Unknown LSM basis: {lsm_basis}. Must be one of: {', '.join(LSM_BASES)}")
+        if greeks not in GREEK_METHODS:
+            raise ValueError(f"Unknown Greek method: {greeks}. Must be one of: {', '.join(GREEK_METHODS)}")
+
+        # pseudo: plain pseudo-random normals; antithetic: each block's second
+        # half mirrors its first; sobol: scrambled Sobol points through a
+        # Brownian bridge, SOBOL_REPLICATES independent scramblings per block
+        self.sampling = sampling
+        if sampling == 'antithetic':
+            # antithetic pairs need even block sizes
+            num_simulations += num_simulations % 2
+            if chunk_size is not None:
+                chunk_size += chunk_size % 2
+
         self.num_simulations = num_simulations
         self.num_steps = num_steps
-        if seed is not None:
-            np.random.seed(seed)
+        self.dtype = np.dtype(dtype)
+        # paths are generated in blocks of chunk_size so peak memory does not
+        # grow with num_simulations (None = one block)
+        self.chunk_size = chunk_size
+        # blocks are spread over num_workers threads (None = one per CPU);
+        # NumPy releases the GIL in the RNG and array kernels. Results depend
+        # only on seed and chunk_size, never on the number of workers
+        self.num_workers = num_workers or os.cpu_count() or 1
+        # adaptive mode: num_simulations is only the pilot run; further blocks
+        # are added until the price's standard error is <= target_error or
+        # max_simulations paths (default 100x the pilot) have been used
+        self.target_error = target_error
+        self.max_simulations = max_simulations or 100 * num_simulations
+        if sampling == 'antithetic':
+            # so the adaptive tail block is even too
+            self.max_simulations += self.max_simulations % 2
+        self.adaptive_blocks = None
+        # American regression basis, evaluated at S / K
+        self.lsm_basis = lsm_basis
+        self.lsm_degree = lsm_degree
+        # pathwise: options take their Greeks from pathwise / likelihood-ratio
+        # estimators on the pricing paths; bump: from re-pricing bumped scenarios
+        self.greeks = greeks
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.shocks = None
+
+    def block_sizes(self):
+        chunk = min(self.chunk_size or self.num_simulations, self.num_simulations)
+        full, rest = divmod(self.num_simulations, chunk)
+        return [chunk] * full + ([rest] if rest else [])
+
+    def block_rng(self, *key):
+        # each block has its own substream of the engine seed, so the same
+        # block always gets the same shocks however often it is regenerated
+        seed = np.random.SeedSequence(self.seed_sequence.entropy,
+                                      spawn_key=self.seed_sequence.spawn_key + key)
+        return np.random.default_rng(seed)
+
+    def block_shocks(self, index, size):
+        # drawn time step by time step (then transposed) so the matrix matches
+        # the shocks simulate_stepwise draws for the same block
+
+        if self.sampling == 'sobol':
+            return self.sobol_shocks(index, size)
+
+        rng = self.block_rng(index)
+
+        if self.sampling == 'antithetic':
+            Z = rng.standard_normal((self.num_steps, size // 2), dtype=self.dtype)
+            return np.concatenate([Z, -Z], axis=1).T
+
+        return rng.standard_normal((self.num_steps, size), dtype=self.dtype).T
+
+    def sobol_shocks(self, index, size):
+
+        from scipy.stats import qmc
+        from scipy.special import ndtri
+
+        # the block's paths are split between SOBOL_REPLICATES sequences, each
+        # scrambled from its own substream, so their estimates are independent
+        points = []
+        for replicate, part in enumerate(np.array_split(np.arange(size), SOBOL_REPLICATES)):
+            sampler = qmc.Sobol(d=self.num_steps, scramble=True, seed=self.block_rng(index, replicate))
+            # scipy warns when a size is not a power of 2; the points are still valid
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)
+                points.append(sampler.random(part.size))
+        points = np.concatenate(points)
+
+        eps = np.finfo(np.float64).eps
+        Z = ndtri(np.clip(points, eps, 1 - eps))
+
+        return brownian_bridge_increments(Z).astype(self.dtype, copy=False)
+
+    def iter_step_shocks(self, index, size):
+        """Shocks of one block, one (size,) vector per time step"""
+
+        if self.sampling == 'sobol':
+            # the bridge needs every coordinate of a point, so quasi-random
+            # blocks are built whole and handed out column by column
+            shocks = self.block_shocks(index, size)
+            for step in range(self.num_steps):
+                yield shocks[:, step]
+            return
+
+        rng = self.block_rng(index)
+
+        for _ in range(self.num_steps):
+            if self.sampling == 'antithetic':
+                Z = rng.standard_normal(size // 2, dtype=self.dtype)
+                yield np.concatenate([Z, -Z])
+            else:
+                yield rng.standard_normal(size, dtype=self.dtype)
+
+    def new_statistics(self, stats=None):
+        stats = stats if stats is not None else PayoffStatistics()
+        if self.sampling == 'antithetic':
+            return AntitheticStatistics(stats)
+        if self.sampling == 'sobol':
+            return ReplicateStatistics(stats, SOBOL_REPLICATES)
+        return stats
+
+    def generate_shocks(self):
+        # drawn once per engine and reused by every valuation, so bumped
+        # scenarios (spot/vol/rate/time) see common random numbers
+        if self.shocks is None:
+            self.shocks = self.block_shocks(0, self.num_simulations)
+        return self.shocks
+
+    def reset_shocks(self):
+        # frees the cached shocks; they are regenerated identically on next use
+        self.shocks = None
 
     def simulate_paths(self, S0, T, r, sigma, q=0):
-        return BlackScholesModel.simulate_paths(S0, T, r, sigma, q, self.num_simulations, self.num_steps)
+        return BlackScholesModel.paths_from_shocks(S0, T, r, sigma, q, self.generate_shocks())
 
-    def price_european(self, S0, K, T, r, sigma, q, option_type):
-        paths = self.simulate_paths(S0, T, r, sigma, q)
-        ST = paths[:, -1]
+    def block_paths(self, index, size, S0, T, r, sigma, q=0):
+
+        if index == 0 and size == self.num_simulations:
+            return self.simulate_paths(S0, T, r, sigma, q)
+
+        return BlackScholesModel.paths_from_shocks(S0, T, r, sigma, q, self.block_shocks(index, size))
+
+    def map_blocks(self, block_fn, blocks):
+
+        if self.num_workers > 1 and len(blocks) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.num_workers, len(blocks))) as pool:
+                return list(pool.map(block_fn, *zip(*blocks)))
+
+        return [block_fn(index, size) for index, size in blocks]
+
+    def run_blocks(self, block_fn, discount=1.0):
+        """
+        Call block_fn(index, size) -> PayoffStatistics for every block, on the
+        worker threads if there are several, and merge the partial results in
+        block order so the floating-point sums do not depend on scheduling.
+
+        With a target_error, keeps adding blocks until discount * standard
+        error reaches it. Blocks are run num_workers at a time but merged and
+        checked one by one, so the stopping point does not depend on the
+        number of workers either. The blocks chosen by the first adaptive run
+        are kept for every later run on this engine, so bumped Greeks still
+        use exactly the same paths as the price.
+        """
+
+        blocks = self.adaptive_blocks or list(enumerate(self.block_sizes()))
+
+        stats = None
+        for partial in self.map_blocks(block_fn, blocks):
+            if stats is None:
+                stats = partial
+            else:
+                stats.merge(partial)
+
+        if self.target_error is None or self.adaptive_blocks is not None:
+            return stats
+
+        used = list(blocks)
+        batch = min(self.chunk_size or self.num_simulations, self.num_simulations)
+        index = len(blocks)
+
+        while discount * stats.std_error > self.target_error and stats.count < self.max_simulations:
+            extra = []
+            remaining = self.max_simulations - stats.count
+            while len(extra) < self.num_workers and remaining > 0:
+                size = min(batch, remaining)
+                extra.append((index, size))
+                index += 1
+                remaining -= size
+
+            for block, partial in zip(extra, self.map_blocks(block_fn, extra)):
+                stats.merge(partial)
+                used.append(block)
+                if discount * stats.std_error <= self.target_error:
+                    break
+
+        self.adaptive_blocks = used
+        return stats
+
+    def estimate(self, stats, discount, T=None, r=None):
+        results = {
+            'price': discount * stats.mean,
+            'std_error': discount * stats.std_error,
+            'num_paths': stats.count
+        }
+
+        greeks = getattr(stats, 'greeks', None)
+        if greeks and T is not None:
+            results['greeks'] = self.sensitivity_greeks(greeks, discount, T, r, results['price'])
+
+        return results
 
-        if option_type.lower() == 'call':
-            payoffs = np.maximum(ST - K, 0)
+    @staticmethod
+    def expired_estimate(S0, K, option_type, greeks=False, rebate=None):
+        """
+        Estimate at expiry, without simulating: the vanilla payoff (or the
+        rebate, if given) with intrinsic delta and no other sensitivity, as
+        the deterministic engines settle it. The pathwise and
+        likelihood-ratio weights divide by T.
+        """
+
+        if rebate is None:
+            price, delta = float(vanilla_payoff(S0, K, option_type)), float(vanilla_slope(S0, K, option_type))
         else:
-            payoffs = np.maximum(K - ST, 0)
+            price, delta = float(rebate), 0.0
 
-        price = np.exp(-r * T) * np.mean(payoffs)
-        return price
+        results = {'price': price, 'std_error': 0.0, 'num_paths': 0}
+        if greeks:
+            results['greeks'] = {'delta': delta, 'gamma': 0.0, 'vega': 0.0, 'theta': 0.0, 'rho': 0.0}
+        return results
 
-    def price_american(self, S0, K, T, r, sigma, q, option_type):
+    @staticmethod
+    def sensitivity_greeks(greeks, discount, T, r, price):
+        """
+        Greeks from the means of the integrands recorded with the price:
+        derivatives of the undiscounted payoff w.r.t. S0 ('spot', 'gamma'),
+        sigma ('vol'), r ('rate') and T ('time'), in the units of the
+        Monte Carlo options (vega and rho per 1%, theta per year).
+        """
+
+        mean = {name: float(discount * stats.mean) for name, stats in greeks.items()}
+        return {
+            'delta': mean['spot'],
+            'gamma': mean['gamma'],
+            'vega': mean['vol'] / 100,
+            'theta': float(-(mean['time'] - r * price)),
+            'rho': float((mean['rate'] - T * price) / 100)
+        }
+
+    def simulate_stepwise(self, S0, T, r, sigma, q, accumulator, discount=1.0):
+        """
+        Advance only the current spot of each path, one time step at a time,
+        and let the accumulator fold every step into its own running state.
+        Memory is O(paths) per block instead of O(paths x steps), and paths the
+        accumulator drops (e.g. knocked out) are not simulated any further.
+
+        Returns PayoffStatistics of the undiscounted payoffs (discount is only
+        used to judge the adaptive target_error).
+        """
 
-        paths = self.simulate_paths(S0, T, r, sigma, q)
         dt = T / self.num_steps
+        drift = (r - q - 0.5 * sigma**2) * dt
+        vol = sigma * np.sqrt(dt)
 
+        def simulate_block(index, size):
+            # each block gets its own copy so worker threads never share state
+            block_accumulator = copy.copy(accumulator)
+            shocks = self.iter_step_shocks(index, size)
+            S = np.full(size, S0, dtype=self.dtype)
+            alive = np.arange(size)
 
-        if option_type.lower() == 'call':
-            intrinsic_value = np.maximum(paths - K, 0)
-        else:
-            intrinsic_value = np.maximum(K - paths, 0)
+            block_accumulator.start(size)
 
+            for step in range(self.num_steps + 1):
+                if step > 0:
+                    Z = next(shocks)
+                    if alive.size < size:
+                        Z = Z[alive]
+                    S *= np.exp(drift + vol * Z)
 
-        cash_flows = intrinsic_value[:, -1].copy()
+                keep = block_accumulator.update(S, alive)
+                if keep is not None and not keep.all():
+                    S = S[keep]
+                    alive = alive[keep]
 
+            stats = self.new_statistics(block_accumulator.statistics())
+            block_accumulator.record(stats, S, alive, size)
+            return stats
 
-        for t in range(self.num_steps - 1, 0, -1):
+        return self.run_blocks(simulate_block, discount)
 
-            discounted_cf = cash_flows * np.exp(-r * dt)
+    def _scenario_groups(self, S0, T, sigma):
+        # scenarios sharing (T, sigma) share their paths up to the factor S0
+        S0, T, sigma = (np.ravel(x).astype(float) for x in np.broadcast_arrays(S0, T, sigma))
+        groups = {}
+        for i, key in enumerate(zip(T, sigma)):
+            groups.setdefault(key, []).append(i)
+        return S0, groups
 
+    def estimate_scenarios(self, S0, T, r, sigma, q, accumulator_at):
+        """
+        Revalue many scenarios on the engine's shocks without re-simulating.
+        S0, T and sigma broadcast together; accumulator_at(S0, T, sigma)
+        returns the (accumulator, discount) of one scenario, e.g. from
+        asian_accumulator or barrier_accumulator.
 
-            itm = intrinsic_value[:, t] > 0
+        Each block's shocks are drawn once. Paths are built once per
+        distinct (T, sigma) for unit spot and scaled by every S0 sharing
+        them, so spot shocks cost a multiplication per step. Uses the blocks
+        of the engine's first adaptive run, if there was one.
 
-            if np.sum(itm) > 0:
-                X = paths[itm, t]
-                Y = discounted_cf[itm]
+        Returns list of estimate dicts, in scenario order
+        """
 
-                regression = np.polyfit(X, Y, 2)
-                continuation_value = np.polyval(regression, X)
+        S0, groups = self._scenario_groups(S0, T, sigma)
+        scenarios = [(S0[i], T_, sigma_) for (T_, sigma_), members in groups.items() for i in members]
+        order = [i for members in groups.values() for i in members]
+        built = [accumulator_at(*scenario) for scenario in scenarios]
 
-                exercise = intrinsic_value[itm, t] > continuation_value
+        def revalue_block(index, size):
+            Z = self.block_shocks(index, size)
+            stats = []
+            position = 0
+            for (T_, sigma_), members in groups.items():
+                unit = BlackScholesModel.paths_from_shocks(1.0, T_, r, sigma_, q, Z)
+                for i in members:
+                    accumulator = copy.copy(built[position][0])
+                    stats.append(self._accumulate(accumulator, S0[i] * unit, size))
+                    position += 1
+            return stats
 
-                cash_flows[itm] = np.where(exercise,
-                                          intrinsic_value[itm, t],
-                                          discounted_cf[itm])
+        blocks = self.adaptive_blocks or list(enumerate(self.block_sizes()))
+        merged = None
+        for partial in self.map_blocks(revalue_block, blocks):
+            if merged is None:
+                merged = partial
+            else:
+                for stats, more in zip(merged, partial):
+                    stats.merge(more)
 
-        price = np.exp(-r * dt) * np.mean(cash_flows)
-        return price
+        results = [None] * len(order)
+        for position, (i, stats) in enumerate(zip(order, merged)):
+            results[i] = self.estimate(stats, built[position][1])
+        return results
 
-    def price_asian(self, S0, K, T, r, sigma, q, option_type, average_type='arithmetic'):
+    def _accumulate(self, accumulator, paths, size):
+        # simulate_stepwise's block loop over precomputed paths
 
-        paths = self.simulate_paths(S0, T, r, sigma, q)
+        alive = np.arange(size)
+        accumulator.start(size)
 
-        if average_type == 'arithmetic':
-            avg_prices = np.mean(paths, axis=1)
-        else:
-            avg_prices = np.exp(np.mean(np.log(paths), axis=1))
+        for step in range(self.num_steps + 1):
+            S = paths[alive, step]
+            keep = accumulator.update(S, alive)
+            if keep is not None and not keep.all():
+                S = S[keep]
+                alive = alive[keep]
 
-        if option_type.lower() == 'call':
-            payoffs = np.maximum(avg_prices - K, 0)
-        else:
-            payoffs = np.maximum(K - avg_prices, 0)
+        stats = self.new_statistics(accumulator.statistics())
+        accumulator.record(stats, S, alive, size)
+        return stats
+
+    def estimate_american_scenarios(self, S0, K, T, r, sigma, q, option_type):
+        """
+        estimate_american for many scenarios (S0, T and sigma broadcast
+        together) on the engine's shocks: one Longstaff-Schwartz pass per
+        scenario over paths built once per distinct (T, sigma).
+
+        Returns list of estimate dicts, in scenario order
+        """
+
+        S0, groups = self._scenario_groups(S0, T, sigma)
+        Z = self.generate_shocks()
+        results = [None] * len(S0)
+
+        for (T_, sigma_), members in groups.items():
+            unit = BlackScholesModel.paths_from_shocks(1.0, T_, r, sigma_, q, Z)
+            step_discount = np.exp(-r * (T_ / self.num_steps))
+            for i in members:
+                cash_flows, _ = self.longstaff_schwartz(S0[i] * unit, K, T_, r, option_type)
+                stats = self.new_statistics()
+                stats.add(cash_flows)
+                results[i] = self.estimate(stats, step_discount)
 
-        price = np.exp(-r * T) * np.mean(payoffs)
-        return price
+        return results
 
-    def price_barrier(self, S0, K, T, r, sigma, q, option_type, barrier_type, barrier_level):
+    def estimate_european(self, S0, K, T, r, sigma, q, option_type):
 
+        def price_block(index, size):
+            ST = self.block_paths(index, size, S0, T, r, sigma, q)[:, -1]
+
+            stats = self.new_statistics()
+            stats.add(vanilla_payoff(ST, K, option_type))
+            return stats
+
+        discount = np.exp(-r * T)
+        return self.estimate(self.run_blocks(price_block, discount), discount)
+
+    def price_european(self, S0, K, T, r, sigma, q, option_type):
+        return self.estimate_european(S0, K, T, r, sigma, q, option_type)['price']
+
+    def estimate_american(self, S0, K, T, r, sigma, q, option_type, greeks=False):
+        """
+        Longstaff-Schwartz: step back through the paths, regressing the
+        discounted future cash flow of in-the-money paths on lsm_basis of S/K
+        and exercising where intrinsic value beats the fitted continuation.
+
+        With greeks=True the result also holds 'greeks', pathwise at each
+        path's exercise date with the fitted exercise rule held fixed (it is
+        optimal, so moving it has no first-order effect).
+        """
+
+        if T <= 0:
+            return self.expired_estimate(S0, K, option_type, greeks)
+
+        # the regression at each step needs every path, so LSM is never chunked
+        # or extended adaptively
         paths = self.simulate_paths(S0, T, r, sigma, q)
-        ST = paths[:, -1]
-
-        if barrier_type == 'up-and-out':
-            knocked = np.max(paths, axis=1) >= barrier_level
-        elif barrier_type == 'up-and-in':
-            knocked = np.max(paths, axis=1) >= barrier_level
-        elif barrier_type == 'down-and-out':
-            knocked = np.min(paths, axis=1) <= barrier_level
-        elif barrier_type == 'down-and-in':
-            knocked = np.min(paths, axis=1) <= barrier_level
-        else:
-            raise ValueError(f"Unknown barrier type: {barrier_type}")
+        step_discount = np.exp(-r * (T / self.num_steps))
+        cash_flows, exercise_steps = self.longstaff_schwartz(paths, K, T, r, option_type)
 
-        if option_type.lower() == 'call':
-            payoffs = np.maximum(ST - K, 0)
-        else:
-            payoffs = np.maximum(K - ST, 0)
+        if not greeks:
+            stats = self.new_statistics()
+            stats.add(cash_flows)
+            return self.estimate(stats, step_discount)
+
+        stats = self.new_statistics(SensitivityStatistics(PayoffStatistics()))
+        stats.add(cash_flows)
+        stats.add_greeks(self._american_greek_integrands(paths, exercise_steps, S0, K, T, r, sigma, q, option_type))
+        results = self.estimate(stats, step_discount)
+        results['greeks'] = self.sensitivity_greeks(stats.greeks, np.exp(-r * T), T, r, results['price'])
+        return results
+
+    def longstaff_schwartz(self, paths, K, T, r, option_type):
+        """
+        Backward induction over simulated paths: the cash flow of each path
+        valued at the first step, and the step it is exercised at.
+        """
+
+        dt = T / self.num_steps
+        step_discount = np.exp(-r * dt)
 
-        if 'out' in barrier_type:
-            payoffs = np.where(knocked, 0, payoffs)
+        cash_flows = vanilla_payoff(paths[:, -1], K, option_type).astype(np.float64)
+        exercise_steps = np.full(len(paths), self.num_steps)
+
+        for t in range(self.num_steps - 1, 0, -1):
+
+            # cash flows valued at t
+            cash_flows *= step_discount
+
+            intrinsic_value = vanilla_payoff(paths[:, t], K, option_type)
+            itm = np.flatnonzero(intrinsic_value > 0)
+
+            if itm.size <= self.lsm_degree:
+                continue
+
+            basis = lsm_basis(paths[itm, t] / K, self.lsm_basis, self.lsm_degree)
+            continuation_value = basis @ solve_normal_equations(basis, cash_flows[itm])
+
+            exercise = itm[intrinsic_value[itm] > continuation_value]
+            cash_flows[exercise] = intrinsic_value[exercise]
+            exercise_steps[exercise] = t
+
+        return cash_flows, exercise_steps
+
+    def _american_greek_integrands(self, paths, exercise_steps, S0, K, T, r, sigma, q, option_type):
+
+        model = PathSensitivities(S0, T, r, sigma, q, self.num_steps)
+        S = paths[np.arange(len(paths)), exercise_steps].astype(np.float64)
+        exercise_times = exercise_steps * model.dt
+
+        # cash flow carried to expiry, e^{r (T - tau)} payoff(S_tau), and its derivatives
+        growth = np.exp(r * (T - exercise_times))
+        values = growth * vanilla_payoff(S, K, option_type)
+        derivatives = growth * vanilla_slope(S, K, option_type) * S * model.log_spot(S, exercise_steps)
+        derivatives[2:] += values * model.growth(exercise_times)[2:]
+
+        Z1 = model.shock(np.log(paths[:, 1] / S0))
+        return {
+            'spot': derivatives[0] / S0,
+            'gamma': model.first_step_gamma(Z1, derivatives[0]),
+            'vol': derivatives[1],
+            'rate': derivatives[2],
+            'time': derivatives[3]
+        }
+
+    def price_american(self, S0, K, T, r, sigma, q, option_type):
+        return self.estimate_american(S0, K, T, r, sigma, q, option_type)['price']
+
+    def estimate_asian(self, S0, K, T, r, sigma, q, option_type, average_type='arithmetic', control_variate=False,
+                       greeks=False):
+        """
+        With greeks=True (arithmetic average only) the result also holds
+        'greeks' estimated pathwise on the same paths as the price.
+        """
+
+        if T <= 0:
+            # every averaging date is today
+            return self.expired_estimate(S0, K, option_type, greeks)
+
+        accumulator, discount = self.asian_accumulator(S0, K, T, r, sigma, q, option_type, average_type,
+                                                       control_variate, greeks)
+        stats = self.simulate_stepwise(S0, T, r, sigma, q, accumulator, discount)
+        return self.estimate(stats, discount, T, r)
+
+    def asian_accumulator(self, S0, K, T, r, sigma, q, option_type, average_type='arithmetic', control_variate=False,
+                          greeks=False):
+        """AsianAccumulator for estimate_asian, and the discount factor to expiry"""
+
+        discount = np.exp(-r * T)
+        control_mean = None
+        if control_variate and average_type == 'arithmetic':
+            control_mean = BlackScholesModel.geometric_asian_price(S0, K, T, r, sigma, q, option_type,
+                                                                   self.num_steps) / discount
+
+        sensitivities = PathSensitivities(S0, T, r, sigma, q, self.num_steps) if greeks else None
+        accumulator = AsianAccumulator(K, option_type, average_type, self.num_steps, control_mean, sensitivities)
+        return accumulator, discount
+
+    def price_asian(self, S0, K, T, r, sigma, q, option_type, average_type='arithmetic', control_variate=False):
+        return self.estimate_asian(S0, K, T, r, sigma, q, option_type, average_type, control_variate)['price']
+
+    def estimate_barrier(self, S0, K, T, r, sigma, q, option_type, barrier_type, barrier_level, rebate=0.0,
+                         monitoring='discrete', monitoring_points=None, greeks=False):
+        """
+        monitoring 'continuous' corrects every step for Brownian-bridge
+        crossings. 'discrete' monitors at monitoring_points equally spaced
+        dates (default: every step): exactly when they fall on the step grid,
+        otherwise continuously against the Broadie-Glasserman-Kou shifted
+        barrier, so num_steps can be far below the number of dates.
+
+        With greeks=True the result also holds 'greeks' estimated on the
+        same paths as the price (see BarrierAccumulator).
+        """
+
+        if T <= 0:
+            # knock-outs pay the vanilla payoff unless knocked already, knock-ins only if knocked
+            knocked = S0 >= barrier_level if barrier_type.startswith('up') else S0 <= barrier_level
+            pays_vanilla = knocked == barrier_type.endswith('in')
+            return self.expired_estimate(S0, K, option_type, greeks, None if pays_vanilla else rebate)
+
+        accumulator, discount = self.barrier_accumulator(S0, K, T, r, sigma, q, option_type, barrier_type,
+                                                         barrier_level, rebate, monitoring, monitoring_points, greeks)
+        stats = self.simulate_stepwise(S0, T, r, sigma, q, accumulator, discount)
+        return self.estimate(stats, discount, T, r)
+
+    def barrier_accumulator(self, S0, K, T, r, sigma, q, option_type, barrier_type, barrier_level, rebate=0.0,
+                            monitoring='discrete', monitoring_points=None, greeks=False):
+        """BarrierAccumulator for estimate_barrier, and the discount factor to expiry"""
+
+        bridge_variance = None
+        monitor_every = 1
+        shifted = False
+
+        if T <= 0:
+            # no time to cross between steps: the check at S0 settles the barrier
+            pass
+        elif monitoring == 'continuous':
+            bridge_variance = sigma**2 * T / self.num_steps
         else:
-            payoffs = np.where(knocked, payoffs, 0)
+            monitoring_points = monitoring_points or self.num_steps
+            if self.num_steps % monitoring_points == 0:
+                monitor_every = self.num_steps // monitoring_points
+            else:
+                barrier_level = float(discrete_barrier_shift(barrier_level, sigma, T, monitoring_points,
+                                                             barrier_type.startswith('up')))
+                bridge_variance = sigma**2 * T / self.num_steps
+                shifted = True
+
+        sensitivities = barrier_tangents = None
+        if greeks:
+            sensitivities = PathSensitivities(S0, T, r, sigma, q, self.num_steps)
+            if shifted:
+                # the shifted barrier moves with sigma and T
+                sign = 1.0 if barrier_type.startswith('up') else -1.0
+                shift = BGK_BETA * np.sqrt(T / monitoring_points)
+                barrier_tangents = sign * np.array([0.0, shift, 0.0, 0.5 * sigma * shift / T])
+
+        # a knock-out rebate paid at monitoring point i grows to expiry at r
+        rebate_growth = np.exp(r * T * (1 - np.arange(self.num_steps + 1) / self.num_steps))
+        accumulator = BarrierAccumulator(K, option_type, barrier_type, barrier_level, rebate, rebate_growth,
+                                         bridge_variance, monitor_every, sensitivities, barrier_tangents)
+        return accumulator, np.exp(-r * T)
 
-        price = np.exp(-r * T) * np.mean(payoffs)
-        return price
\ No newline at end of file
+    def price_barrier(self, S0, K, T, r, sigma, q, option_type, barrier_type, barrier_level, rebate=0.0,
+                      monitoring='discrete', monitoring_points=None):
+        return self.estimate_barrier(S0, K, T, r, sigma, q, option_type, barrier_type, barrier_level, rebate,
+                                     monitoring, monitoring_points)['price']
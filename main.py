@@ -1,7 +1,6 @@
 import sys
 import argparse
 from utils.io_handler import ConfigReader, ResultWriter
-from calculator import OptionCalculator
 
 
 def main():
@@ -23,6 +22,18 @@ Examples:
   # Skip Greeks calculation for faster results
   python main.py --config config/barrier_option.json --no-greeks
 
+  # Value a whole book (JSON lines file or directory of configs)
+  python main.py --portfolio positions.jsonl --output results.jsonl --workers 8
+
+  # Write a book's prices and Greeks as one CSV (or npy, npz, parquet, arrow) table
+  python main.py --portfolio positions.jsonl --output results.csv --format csv
+
+  # Reuse results from earlier runs (identical positions are always valued once)
+  python main.py --portfolio positions.jsonl --cache results.db
+
+  # Run a pricing daemon answering JSON lines on a Unix socket
+  python main.py --serve --socket /tmp/pricing.sock
+
 Supported Option Types:
   - European (call/put)
   - American (call/put)
@@ -31,12 +42,24 @@ Supported Option Types:
         """
     )
 
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group(required=True)
+
+    source.add_argument(
         '--config', '-c',
-        required=True,
         help='Path to config json file'
     )
 
+    source.add_argument(
+        '--portfolio', '-p',
+        help='Path to a JSON lines file or directory of config json files'
+    )
+
+    source.add_argument(
+        '--serve',
+        action='store_true',
+        help='Run a pricing daemon answering one JSON config per line'
+    )
+
     parser.add_argument(
         '--output', '-o',
         default=None,
@@ -45,9 +68,9 @@ Supported Option Types:
 
     parser.add_argument(
         '--format', '-f',
-        choices=['json', 'txt'],
+        choices=['json', 'txt', 'csv', 'npy', 'npz', 'parquet', 'arrow'],
         default='json',
-        help='Output format (default: json)'
+        help='Output format; csv, npy, npz, parquet and arrow write one table for a whole portfolio (default: json)'
     )
 
     parser.add_argument(
@@ -62,9 +85,61 @@ Supported Option Types:
         help='Simple output (default: price only)'
     )
 
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=None,
+        help='Worker processes for Monte Carlo positions in portfolio and server mode (default: one per CPU)'
+    )
+
+    parser.add_argument(
+        '--socket',
+        default=None,
+        help='Unix socket path for --serve (default: localhost TCP on --port)'
+    )
+
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='Localhost TCP port for --serve (default: 8765)'
+    )
+
+    parser.add_argument(
+        '--batch-window',
+        type=float,
+        default=0.5,
+        help='Milliseconds --serve waits to batch requests together (default: 0.5)'
+    )
+
+    parser.add_argument(
+        '--cache',
+        default=None,
+        help='Path to an on-disk result cache reused across runs (default: in memory only)'
+    )
+
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=10000,
+        help='Results kept in the in-memory cache (default: 10000)'
+    )
+
     args = parser.parse_args()
 
+    # pricing modules (and NumPy) load only once there is something to price,
+    # bound at module level so run_portfolio sees them too
+    global OptionCalculator, ResultCache
+    from calculator import OptionCalculator
+    from result_cache import ResultCache
+
     try:
+        if args.serve:
+            return run_server(args)
+
+        if args.portfolio is not None:
+            return run_portfolio(args)
+
         # read config
         print(f"Reading configuration from: {args.config}")
         config = ConfigReader.read_config(args.config)
@@ -77,8 +152,12 @@ Supported Option Types:
 
         # calc
         print("Calculating price...")
-        calculator = OptionCalculator(config)
-        results = calculator.calculate(compute_greeks=not args.no_greeks)
+        if args.cache is not None:
+            with ResultCache(args.cache_size, args.cache) as cache:
+                results = cache.calculate(config, compute_greeks=not args.no_greeks)
+        else:
+            calculator = OptionCalculator(config)
+            results = calculator.calculate(compute_greeks=not args.no_greeks)
 
         # display results
         ResultWriter.write_results(
@@ -106,5 +185,77 @@ Supported Option Types:
         return 1
 
 
+def run_portfolio(args):
+
+    print(f"Reading portfolio from: {args.portfolio}", file=sys.stderr)
+    configs = ConfigReader.read_portfolio(args.portfolio)
+
+    # invalid positions are reported in the output rather than stopping the book
+    valid_configs = []
+    invalid_results = []
+    for index, config in enumerate(configs):
+        try:
+            is_valid, error_msg = ConfigReader.validate_config(config)
+        except (AttributeError, TypeError) as e:
+            is_valid, error_msg = False, f"Invalid configuration: {e}"
+        if is_valid:
+            valid_configs.append((index, config))
+        else:
+            invalid_results.append({'position': index, 'error': error_msg, 'parameters': config})
+
+    print(f"Calculating {len(valid_configs)} positions...", file=sys.stderr)
+    errors = len(invalid_results)
+
+    def results(cache):
+        nonlocal errors
+        yield from invalid_results
+        positions = [config for _, config in valid_configs]
+        for result in cache.calculate_portfolio(positions, compute_greeks=not args.no_greeks,
+                                                max_workers=args.workers):
+            result['position'] = valid_configs[result['position']][0]
+            if 'error' in result:
+                errors += 1
+            yield result
+
+    # portfolio output is JSON lines unless a columnar format is asked for
+    format = 'json' if args.format == 'txt' else args.format
+
+    with ResultCache(args.cache_size, args.cache) as cache:
+        ResultWriter.stream_results(results(cache), output_path=args.output, detailed=not args.simple,
+                                    format=format)
+        stats = cache.stats()
+
+    print(f"Cache: {stats['hits']} hits ({stats['disk_hits']} from disk), {stats['misses']} misses, "
+          f"{stats['uncacheable']} unseeded Monte Carlo", file=sys.stderr)
+
+    if errors:
+        print(f"Error: {errors} positions could not be valued", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def run_server(args):
+    import asyncio
+    from server import PricingServer
+
+    server = PricingServer(compute_greeks=not args.no_greeks, batch_window=args.batch_window / 1000,
+                           max_workers=args.workers)
+    address = args.socket or f"127.0.0.1:{args.port}"
+    print(f"Serving on {address} (Ctrl-C to stop)", file=sys.stderr)
+
+    try:
+        asyncio.run(server.serve(path=args.socket, port=args.port))
+    except KeyboardInterrupt:
+        pass
+
+    stats = server.stats()
+    print(f"Served {stats['requests']} requests in {stats['batches']} batches ({stats['errors']} errors), "
+          f"latency p50 {stats['latency_ms']['p50']:.3f} ms, p99 {stats['latency_ms']['p99']:.3f} ms",
+          file=sys.stderr)
+
+    return 0
+
+
 if __name__ == '__main__':
     sys.exit(main())
\ No newline at end of file
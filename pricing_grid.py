@@ -0,0 +1,189 @@
+"""
+pricing_grid.py
+
+Precomputed price/Greeks grids for fast revaluation of one position under
+small market moves
+"""
+
+import math
+import numpy as np
+from calculator import calculate_portfolio
+
+
+GREEK_NAMES = ('delta', 'gamma', 'vega', 'theta', 'rho')
+
+# grid axes: config field and query keyword
+GRID_AXES = {
+    'spot': 'underlying_price',
+    'vol': 'volatility',
+    'time': 'time_to_maturity',
+}
+
+
+def chebyshev_nodes(lo, hi, n):
+    """Chebyshev points of the first kind mapped to [lo, hi], in increasing order"""
+    x = np.cos(np.pi * (np.arange(n)[::-1] + 0.5) / n)
+    return 0.5 * (lo + hi) + 0.5 * (hi - lo) * x
+
+
+def chebyshev_basis(x, lo, hi, n):
+    """T_0..T_{n-1} at x (mapped from [lo, hi] to [-1, 1]), shape (n,) + x.shape"""
+    t = np.clip((2 * np.asarray(x, dtype=float) - (lo + hi)) / (hi - lo), -1.0, 1.0)
+    return np.cos(np.arange(n).reshape((n,) + (1,) * t.ndim) * np.arccos(t))
+
+
+class PricingGrid:
+    """
+    Price and Greeks of one option (any config OptionCalculator accepts)
+    precomputed on a Chebyshev grid over spot, and optionally volatility and
+    time to maturity, then interpolated for revaluation queries.
+
+    Each axis spans value * (1 - width) .. value * (1 + width) around the
+    config's value, with num_nodes Chebyshev points (spot ranges stop at a
+    barrier, where the value has a kink). Nodes are valued with
+    calculate_portfolio, so European grids are one vectorised pass and the
+    rest run in a process pool.
+
+    query() answers from the interpolants; a query outside the grid (or with
+    a parameter that is not gridded and has moved) rebuilds the grid around
+    it first. error_bounds estimates the interpolation error per quantity
+    from the size of the highest-order Chebyshev coefficients, plus the
+    largest Monte Carlo standard error of the node prices.
+    """
+
+    def __init__(self, config, spot_width=0.2, num_nodes=24, vol_width=None, vol_nodes=8, time_width=None,
+                 time_nodes=8, compute_greeks=True, max_workers=None):
+        self.config = dict(config)
+        self.widths = {'spot': spot_width, 'vol': vol_width, 'time': time_width}
+        self.sizes = {'spot': num_nodes, 'vol': vol_nodes, 'time': time_nodes}
+        self.axes = [axis for axis in GRID_AXES if self.widths[axis] is not None]
+        self.compute_greeks = compute_greeks
+        self.max_workers = max_workers
+        self.names = ('price',) + (GREEK_NAMES if compute_greeks else ())
+        self.rebuilds = 0
+        self.orders = {axis: np.arange(n, dtype=float) for axis, n in self.sizes.items()}
+
+        if num_nodes < 2 or (vol_width is not None and vol_nodes < 2) or (time_width is not None and time_nodes < 2):
+            raise ValueError("Every grid axis needs at least 2 nodes")
+
+        self.build()
+
+    def _bounds(self, axis, value):
+
+        width = self.widths[axis]
+        lo, hi = value * (1 - width), value * (1 + width)
+
+        if axis == 'spot' and 'barrier_level' in self.config:
+            barrier = float(self.config['barrier_level'])
+            if barrier < value:
+                lo = max(lo, barrier)
+            else:
+                hi = min(hi, barrier)
+
+        return lo, hi
+
+    def build(self):
+        """(Re)value every node around the current config and refit the interpolants"""
+
+        self.bounds = {axis: self._bounds(axis, float(self.config[GRID_AXES[axis]])) for axis in self.axes}
+        nodes = [chebyshev_nodes(*self.bounds[axis], self.sizes[axis]) for axis in self.axes]
+        shape = tuple(len(n) for n in nodes)
+
+        configs = []
+        for point in np.stack(np.meshgrid(*nodes, indexing='ij'), axis=-1).reshape(-1, len(self.axes)):
+            configs.append({**self.config, **{GRID_AXES[axis]: float(value) for axis, value in zip(self.axes, point)}})
+
+        values = np.empty((len(self.names), len(configs)))
+        noise = 0.0
+        for result in calculate_portfolio(configs, self.compute_greeks, self.max_workers):
+            if 'error' in result:
+                raise ValueError(f"Invalid grid node: {result['error']}")
+            index = result['position']
+            values[0, index] = result['price']
+            for i, name in enumerate(self.names[1:], start=1):
+                values[i, index] = result['greeks'][name]
+            noise = max(noise, result.get('std_error', 0.0))
+
+        # coefficients by the discrete cosine transform along each axis
+        coefficients = values.reshape((len(self.names),) + shape)
+        for dim, n in enumerate(shape, start=1):
+            k = np.arange(n)
+            transform = np.cos(np.pi * np.outer(k, k[::-1] + 0.5) / n) * (2 / n)
+            transform[0] *= 0.5
+            coefficients = np.moveaxis(np.tensordot(transform, coefficients, axes=([1], [dim])), 0, dim)
+        self.coefficients = coefficients
+
+        # truncation error ~ the last two coefficients of each axis
+        self.error_bounds = {}
+        for i, name in enumerate(self.names):
+            tail = 0.0
+            for dim in range(len(shape)):
+                tail += np.abs(np.take(coefficients[i], [-2, -1], axis=dim)).sum(axis=dim).max()
+            self.error_bounds[name] = float(tail + (noise if name == 'price' else 0.0))
+
+        self.built_for = dict(self.config)
+
+    def _rebuild_if_needed(self, point):
+
+        outside = False
+        for axis, value in point.items():
+            if value is None:
+                continue
+            if axis in self.axes:
+                lo, hi = self.bounds[axis]
+                if isinstance(value, float):
+                    outside |= value < lo or value > hi
+                else:
+                    outside |= bool(np.min(value) < lo or np.max(value) > hi)
+            else:
+                outside |= bool(np.any(value != float(self.built_for[GRID_AXES[axis]])))
+
+        if outside:
+            # recentre on the query (the middle of its range for arrays)
+            for axis, value in point.items():
+                if value is not None:
+                    self.config[GRID_AXES[axis]] = float(0.5 * (np.min(value) + np.max(value)))
+            self.build()
+            self.rebuilds += 1
+
+    def query(self, S, sigma=None, T=None):
+        """
+        Interpolated price and Greeks (in OptionCalculator's units) at spot S
+        and, if given, volatility sigma and time to maturity T; S, sigma and T
+        may be arrays, broadcast together.
+
+        Returns dict: price, the Greeks and error_bounds
+        """
+
+        point = {'spot': S, 'vol': sigma, 'time': T}
+        scalar = all(np.ndim(value) == 0 for value in point.values())
+        if scalar:
+            point = {axis: None if value is None else float(value) for axis, value in point.items()}
+        self._rebuild_if_needed(point)
+
+        if scalar:
+            # contract one grid axis at a time, last first, with plain float maths for the basis
+            values = self.coefficients
+            for axis in reversed(self.axes):
+                x = point[axis] if point[axis] is not None else float(self.config[GRID_AXES[axis]])
+                lo, hi = self.bounds[axis]
+                t = min(max((2 * x - (lo + hi)) / (hi - lo), -1.0), 1.0)
+                values = values @ np.cos(self.orders[axis] * math.acos(t))
+            results = dict(zip(self.names, values.tolist()))
+            results['error_bounds'] = dict(self.error_bounds)
+            return results
+
+        coordinates = [np.asarray(point[axis] if point[axis] is not None else self.config[GRID_AXES[axis]],
+                                  dtype=float) for axis in self.axes]
+        coordinates = np.broadcast_arrays(*coordinates)
+
+        shape = coordinates[0].shape
+        bases = [chebyshev_basis(x.ravel(), *self.bounds[axis], self.sizes[axis])
+                 for axis, x in zip(self.axes, coordinates)]
+        letters = 'ijk'[:len(bases)]
+        subscripts = f"q{letters}," + ','.join(f"{letter}m" for letter in letters) + '->qm'
+        values = np.einsum(subscripts, self.coefficients, *bases).reshape((len(self.names),) + shape)
+
+        results = {name: (value if value.ndim else float(value)) for name, value in zip(self.names, values)}
+        results['error_bounds'] = dict(self.error_bounds)
+        return results
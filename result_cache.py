@@ -0,0 +1,291 @@
+"""
+result_cache.py
+
+Content-addressed cache of OptionCalculator results, so identical
+positions and repeated runs cost a lookup instead of a revaluation
+"""
+
+import copy
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from calculator import calculate_from_config, calculate_portfolio, default_engine
+
+
+# bump when a pricing change makes previously persisted results stale
+CACHE_VERSION = 2
+
+# on-disk writes are committed (one fsync) every this many results, and on close
+COMMIT_EVERY = 1000
+
+# the fields OptionCalculator reads, with the defaults it fills in when a
+# config leaves them out; anything else in a config (ids, labels) is not
+# part of the contract
+CONTRACT_FIELDS = {
+    'option_style': None,
+    'option_type': None,
+    'underlying_price': None,
+    'strike_price': None,
+    'time_to_maturity': None,
+    'volatility': None,
+    'risk_free_rate': None,
+    'dividend_yield': 0.0,
+}
+
+STYLE_FIELDS = {
+    'european': {},
+    'american': {},
+    'asian': {'average_type': 'arithmetic', 'control_variate': True},
+    'barrier': {'barrier_type': None, 'barrier_level': None, 'rebate': 0.0, 'monitoring': 'continuous',
+                'monitoring_points': None},
+}
+
+# num_workers is left out: results do not depend on it
+ENGINE_FIELDS = {
+    'monte_carlo': {'num_simulations': 10000, 'num_steps': 252, 'seed': None, 'chunk_size': None,
+                    'target_error': None, 'max_simulations': None, 'sampling': 'pseudo', 'mc_greeks': 'pathwise'},
+    'lattice': {'num_steps': 252, 'lattice_method': 'crr', 'richardson': False},
+    'analytic': {'analytic_method': 'bjerksund-stensland'},
+    'pde': {'num_steps': 252, 'grid_points': 200, 'rannacher_steps': 2},
+}
+
+# Longstaff-Schwartz regression, American Monte Carlo only
+LSM_FIELDS = {'lsm_basis': 'monomial', 'lsm_degree': 2}
+
+
+def pricing_fields(config):
+    """The fields OptionCalculator reads for config's style and engine, with their defaults"""
+
+    style = str(config.get('option_style', '')).lower()
+    fields = {**CONTRACT_FIELDS, **STYLE_FIELDS.get(style, {})}
+
+    # European options are always priced in closed form, whatever the engine says
+    if style != 'european':
+        engine = str(config.get('engine') or default_engine(style, config.get('monitoring', 'continuous'))).lower()
+        fields['engine'] = engine
+        # the barrier closed form has no method to choose
+        if not (style == 'barrier' and engine == 'analytic'):
+            fields.update(ENGINE_FIELDS.get(engine, {}))
+        if style == 'american' and engine == 'monte_carlo':
+            fields.update(LSM_FIELDS)
+
+    return fields
+
+
+def _canonical_value(value):
+
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = value.strip().lower()
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    if isinstance(value, dict):
+        return {str(key).lower(): _canonical_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(item) for item in value]
+    return str(value)
+
+
+def canonical_key(config, compute_greeks=True):
+    """
+    sha256 of the fields OptionCalculator reads from config (pricing_fields),
+    normalised the way it reads them: string case, numbers as floats (so
+    100, 100.0 and "100" match) and every default filled in, serialised with
+    sorted keys. Other fields such as request ids do not change the key.
+    """
+
+    canonical = {name: _canonical_value(config.get(name, default)) for name, default in pricing_fields(config).items()}
+    payload = json.dumps([CACHE_VERSION, bool(compute_greeks), canonical], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def is_cacheable(config):
+    """Every engine is deterministic except Monte Carlo without a seed"""
+
+    style = str(config.get('option_style', '')).lower()
+    engine = str(config.get('engine') or default_engine(style, config.get('monitoring', 'continuous'))).lower()
+    return style == 'european' or engine != 'monte_carlo' or config.get('seed') is not None
+
+
+class ResultCache:
+    """
+    LRU cache of price/Greeks results keyed by canonical_key, holding at most
+    max_entries results in memory. With a path, results are also written to
+    an SQLite file there and read back on a memory miss, so they survive
+    across runs. Disk writes are committed COMMIT_EVERY results at a time,
+    at the end of calculate_portfolio and on commit() or close().
+
+    Results are stored without their 'parameters' and returned with the
+    caller's own config; failed valuations and unseeded Monte Carlo
+    positions are never stored. Counters: hits (memory or disk), disk_hits,
+    misses, evictions and uncacheable.
+    """
+
+    def __init__(self, max_entries=10000, path=None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncacheable = 0
+
+        self._db = None
+        self._uncommitted = 0
+        if path is not None:
+            self._db = sqlite3.connect(str(path))
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL)")
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def commit(self):
+        """Make every stored result durable on disk"""
+
+        if self._db is not None and self._uncommitted:
+            self._db.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        if self._db is not None:
+            self.commit()
+            self._db.close()
+            self._db = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'uncacheable': self.uncacheable,
+            'entries': len(self._entries),
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def clear(self, persistent=False):
+        """Empty the memory cache and, with persistent, the on-disk store"""
+
+        self._entries.clear()
+        if persistent and self._db is not None:
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
+            self._uncommitted = 0
+
+    def _remember(self, key, result):
+
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        """Stored result (without parameters) for key, or None; counts a hit or miss"""
+
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+        elif self._db is not None:
+            row = self._db.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                result = json.loads(row[0])
+                self._remember(key, result)
+                self.disk_hits += 1
+
+        if result is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(self, key, result):
+
+        if 'error' in result:
+            return
+
+        stored = {name: value for name, value in result.items() if name not in ('parameters', 'position')}
+        stored = json.loads(json.dumps(stored))
+        self._remember(key, stored)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO results (key, result) VALUES (?, ?)", (key, json.dumps(stored)))
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self.commit()
+
+    def calculate(self, config, compute_greeks=True):
+        """calculate_from_config through the cache"""
+
+        if not is_cacheable(config):
+            self.uncacheable += 1
+            return calculate_from_config(config, compute_greeks)
+
+        key = canonical_key(config, compute_greeks)
+        result = self.get(key)
+        if result is None:
+            result = calculate_from_config(config, compute_greeks)
+            self.put(key, result)
+            return result
+
+        return {**result, 'parameters': config}
+
+    def calculate_portfolio(self, configs, compute_greeks=True, max_workers=None):
+        """
+        calculate_portfolio through the cache: cached positions are yielded
+        first, and positions sharing a key are valued once with the result
+        copied to each of them.
+        """
+
+        pending = {}
+        uncached = []
+        for index, config in enumerate(configs):
+            if not is_cacheable(config):
+                self.uncacheable += 1
+                uncached.append((None, [index]))
+                continue
+
+            key = canonical_key(config, compute_greeks)
+            if key in pending:
+                # a duplicate of a position already being valued in this batch
+                self.hits += 1
+                pending[key][1].append(index)
+                continue
+
+            result = self.get(key)
+            if result is not None:
+                yield {'position': index, **result, 'parameters': config}
+            else:
+                pending[key] = (key, [index])
+
+        work = list(pending.values()) + uncached
+        if not work:
+            return
+
+        unique = [configs[indices[0]] for _, indices in work]
+        for result in calculate_portfolio(unique, compute_greeks, max_workers):
+            key, indices = work[result['position']]
+            if key is not None:
+                self.put(key, result)
+            for index in indices:
+                yield {**copy.deepcopy(result), 'position': index, 'parameters': configs[index]}
+
+        self.commit()
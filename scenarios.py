@@ -0,0 +1,152 @@
+"""
+scenarios.py
+
+Scenario / stress ladders: one position revalued over a grid of spot,
+volatility and time shocks in one pass
+"""
+
+import numpy as np
+from calculator import OptionCalculator
+from logic.european import EuropeanOption
+from logic.american import AmericanOption
+from logic.asian import AsianOption
+from logic.barrier import BarrierOption
+from logic.black_scholes import BlackScholesModel
+from logic.barrier_analytic import ReinerRubinsteinModel
+
+
+def _ladder_prices(option, S, T, sigma):
+    """
+    Prices (and Monte Carlo standard errors, or None) of option at every
+    scenario of the flat arrays S, T, sigma, all other inputs unchanged.
+    """
+
+    if isinstance(option, EuropeanOption):
+        return BlackScholesModel.price_batch(S, option.K, T, option.r, sigma, option.q, option.option_type)['price'], None
+
+    if isinstance(option, AmericanOption):
+        if option.mc_engine is None:
+            return option.deterministic_engine.price_batch(S, option.K, T, option.r, sigma, option.q,
+                                                           option.option_type, compute_greeks=False)['price'], None
+        option.estimate()
+        estimates = option.mc_engine.estimate_american_scenarios(S, option.K, T, option.r, sigma, option.q,
+                                                                 option.option_type)
+        return _collect(estimates)
+
+    if isinstance(option, AsianOption):
+        if option.average_type == 'geometric':
+            return BlackScholesModel.geometric_asian_price(S, option.K, T, option.r, sigma, option.q,
+                                                           option.option_type, option.num_steps), None
+
+        def accumulator_at(S0, T, sigma):
+            return option.mc_engine.asian_accumulator(S0, option.K, T, option.r, sigma, option.q, option.option_type,
+                                                      option.average_type, option.control_variate)
+
+        # the base valuation goes first so it decides the adaptive path count
+        option.estimate()
+        return _collect(option.mc_engine.estimate_scenarios(S, T, option.r, sigma, option.q, accumulator_at))
+
+    if isinstance(option, BarrierOption):
+        return _barrier_ladder(option, S, T, sigma)
+
+    raise ValueError(f"Scenario ladders are not supported for {type(option).__name__}")
+
+
+def _barrier_ladder(option, S, T, sigma):
+
+    if option.mc_engine is not None:
+        def accumulator_at(S0, T, sigma):
+            return option.mc_engine.barrier_accumulator(S0, option.K, T, option.r, sigma, option.q,
+                                                        option.option_type, option.barrier_type,
+                                                        option.barrier_level, option.rebate, option.monitoring,
+                                                        option.monitoring_points)
+
+        # knocked scenarios are settled by the accumulator's check at S0
+        option.estimate()
+        return _collect(option.mc_engine.estimate_scenarios(S, T, option.r, sigma, option.q, accumulator_at))
+
+    # spot at or through the barrier: out-options pay the rebate now, in-options become the vanilla
+    up = option.barrier_type.startswith('up')
+    knocked = S >= option.barrier_level if up else S <= option.barrier_level
+    prices = np.empty(S.shape)
+
+    if np.any(knocked):
+        if option.barrier_type.endswith('out'):
+            prices[knocked] = option.rebate
+        else:
+            prices[knocked] = BlackScholesModel.price_batch(S[knocked], option.K, T[knocked], option.r,
+                                                            sigma[knocked], option.q, option.option_type)['price']
+
+    live = ~knocked
+    if np.any(live):
+        args = (S[live], option.K, T[live], option.r, sigma[live], option.q, option.option_type,
+                option.barrier_type, option.barrier_level, option.rebate)
+        if option.pde_engine is not None:
+            prices[live] = option.pde_engine.barrier_batch(*args, option._pde_monitoring_points(),
+                                                           compute_greeks=False)['price']
+        else:
+            prices[live] = ReinerRubinsteinModel.price_batch(*args, compute_greeks=False)['price']
+
+    return prices, None
+
+
+def _collect(estimates):
+    prices = np.array([float(estimate['price']) for estimate in estimates])
+    errors = np.array([float(estimate['std_error']) for estimate in estimates])
+    return prices, errors
+
+
+def scenario_ladder(config, spot_shocks=(0.0,), vol_shocks=(0.0,), time_shocks=(0.0,)):
+    """
+    Revalue one position (any config OptionCalculator accepts) over every
+    combination of spot_shocks (relative: S * (1 + shock)), vol_shocks
+    (absolute: sigma + shock) and time_shocks (years elapsed: T - shock).
+
+    Closed-form and deterministic engines price the whole grid as one
+    broadcast array computation. Monte Carlo styles revalue every scenario
+    on the position's own shocks (common random numbers), so the ladder is
+    smooth and its unshocked point is the calculator's price.
+
+    Returns dict: price and pnl (price minus the unshocked price), arrays of
+    shape (len(spot_shocks), len(vol_shocks), len(time_shocks)); base_price;
+    the shocked axes spot, volatility and time_to_maturity; and for Monte
+    Carlo styles std_error, shaped like price
+    """
+
+    calculator = OptionCalculator(config)
+    option = calculator.create_option()
+
+    spot = option.S * (1 + np.asarray(spot_shocks, dtype=float).ravel())
+    volatility = option.sigma + np.asarray(vol_shocks, dtype=float).ravel()
+    time_to_maturity = option.T - np.asarray(time_shocks, dtype=float).ravel()
+
+    errors = []
+    if np.any(spot <= 0):
+        errors.append("spot shocks must leave the underlying price positive")
+    if np.any(volatility <= 0):
+        errors.append("vol shocks must leave the volatility positive")
+    if np.any(time_to_maturity <= 0):
+        errors.append("time shocks must leave time to maturity")
+    if errors:
+        raise ValueError(f"Invalid scenario parameters: {'; '.join(errors)}")
+
+    S, sigma, T = (x.ravel() for x in np.meshgrid(spot, volatility, time_to_maturity, indexing='ij'))
+    shape = (len(spot), len(volatility), len(time_to_maturity))
+
+    # the unshocked position rides along as the last scenario
+    S, T, sigma = (np.append(x, base) for x, base in ((S, option.S), (T, option.T), (sigma, option.sigma)))
+    prices, std_errors = _ladder_prices(option, S, T, sigma)
+    base_price = float(prices[-1])
+
+    results = {
+        'price': prices[:-1].reshape(shape),
+        'pnl': (prices[:-1] - base_price).reshape(shape),
+        'base_price': base_price,
+        'spot': spot,
+        'volatility': volatility,
+        'time_to_maturity': time_to_maturity
+    }
+    if std_errors is not None:
+        results['std_error'] = std_errors[:-1].reshape(shape)
+
+    return results
@@ -0,0 +1,275 @@
+"""
+server.py
+
+Long-running pricing daemon: config-shaped JSON requests over a Unix
+socket or localhost TCP, coalesced into vectorised batches
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from calculator import _calculate_european_batch, _calculate_position
+from utils.io_handler import ConfigReader
+
+
+# requests arriving within this many seconds of the first one are priced together
+BATCH_WINDOW = 0.0005
+MAX_BATCH = 4096
+
+# latency percentiles are taken over the most recent requests
+LATENCY_WINDOW = 10000
+
+
+def _warm_worker():
+    # Ctrl-C is for the server, which shuts the pool down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # every engine is imported once per worker, not on its first request
+    import logic.american
+    import logic.asian
+    import logic.barrier
+    import logic.finite_difference
+
+
+class PricingServer:
+    """
+    Prices newline-delimited JSON requests, one config per line, answering
+    each with one JSON line: the calculate_from_config result, or an
+    'error'. A request's optional 'id' is echoed back, since pipelined
+    requests are answered as they complete. {"command": "stats"} returns
+    stats().
+
+    Requests queued within batch_window of each other form one batch:
+    European positions are priced in a single vectorised Black-Scholes pass
+    and the other styles go to a process pool of max_workers warm workers
+    (one per CPU by default).
+    """
+
+    def __init__(self, compute_greeks=True, batch_window=BATCH_WINDOW, max_batch=MAX_BATCH, max_workers=None):
+        if batch_window < 0:
+            raise ValueError("batch_window must not be negative")
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+
+        self.compute_greeks = compute_greeks
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched = 0
+        self._in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._queue = asyncio.Queue()
+        self._tasks = set()
+        self._pool = None
+
+    def stats(self):
+        latencies = np.array(self._latencies) * 1000
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if latencies.size else (0.0, 0.0, 0.0)
+        return {
+            'queue_depth': self._queue.qsize(),
+            'in_flight': self._in_flight,
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_batch_size': self.batched / self.batches if self.batches else 0.0,
+            'latency_ms': {'p50': float(p50), 'p90': float(p90), 'p99': float(p99)}
+        }
+
+    async def price(self, config):
+        """Result for one config, priced with whatever else arrives in its batch window"""
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((config, future, time.perf_counter()))
+        return await future
+
+    def _finish(self, item, result):
+
+        _, future, started = item
+        self.requests += 1
+        if 'error' in result:
+            self.errors += 1
+        self._latencies.append(time.perf_counter() - started)
+        if not future.done():
+            future.set_result(result)
+
+    def _spawn(self, coroutine):
+        # keep a reference so the task is not collected before it finishes
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _batcher(self):
+
+        while True:
+            batch = [await self._queue.get()]
+            # requests already read off the sockets join at once; only under
+            # load is the batch held open for the window, so a lone request
+            # is not delayed
+            await asyncio.sleep(0)
+            if self.batch_window > 0 and not self._queue.empty():
+                await asyncio.sleep(self.batch_window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                self._dispatch(batch)
+            except Exception as e:
+                # answer the batch rather than lose the batcher, which would hang every later request
+                for item in batch:
+                    if not item[1].done():
+                        self._finish(item, {'error': f"Unexpected error: {e}", 'parameters': item[0]})
+
+    def _dispatch(self, batch):
+
+        self.batches += 1
+        self.batched += len(batch)
+
+        european = []
+        for index, item in enumerate(batch):
+            config = item[0]
+            try:
+                is_valid, error_msg = ConfigReader.validate_config(config)
+            except (AttributeError, TypeError) as e:
+                is_valid, error_msg = False, f"Invalid configuration: {e}"
+            if not is_valid:
+                self._finish(item, {'error': error_msg, 'parameters': config})
+            elif config['option_style'].lower() == 'european':
+                european.append((index, config))
+            else:
+                self._spawn(self._simulate(item))
+
+        for result in _calculate_european_batch(european, self.compute_greeks):
+            self._finish(batch[result.pop('position')], result)
+
+    async def _simulate(self, item):
+
+        config = item[0]
+        self._in_flight += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._pool, _calculate_position, 0, config, self.compute_greeks
+            )
+            result.pop('position')
+        except Exception as e:
+            result = {'error': f"Unexpected error: {e}", 'parameters': config}
+        finally:
+            self._in_flight -= 1
+
+        self._finish(item, result)
+
+    async def _respond(self, line, writer):
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            response = {'error': f"Invalid JSON: {e}"}
+        else:
+            if not isinstance(request, dict):
+                response = {'error': "Each request must be a JSON object"}
+            elif request.get('command') == 'stats':
+                response = self.stats()
+            else:
+                request_id = request.pop('id', None)
+                response = await self.price(request)
+                if request_id is not None:
+                    response = {'id': request_id, **response}
+
+        writer.write((json.dumps(response) + '\n').encode())
+
+    async def _handle(self, reader, writer):
+
+        pending = set()
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(self._respond(line, writer))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path=None, host='127.0.0.1', port=8765):
+        """Serve until SIGTERM or cancelled, on a Unix socket at path if given, else on host:port"""
+
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_warm_worker)
+        # start every worker now so no request waits for a process to spawn
+        for future in [self._pool.submit(int) for _ in range(self.max_workers)]:
+            future.result()
+
+        loop = asyncio.get_running_loop()
+        stopped = loop.create_future()
+        loop.add_signal_handler(signal.SIGTERM, stopped.set_result, None)
+
+        batcher = asyncio.create_task(self._batcher())
+        if path is not None:
+            server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            server = await asyncio.start_server(self._handle, host, port)
+
+        try:
+            async with server:
+                await stopped
+        finally:
+            loop.remove_signal_handler(signal.SIGTERM)
+            batcher.cancel()
+            self._pool.shutdown(cancel_futures=True)
+            if path is not None and os.path.exists(path):
+                os.unlink(path)
+
+
+class PricingClient:
+    """Blocking client for PricingServer, one connection reused across calls"""
+
+    def __init__(self, path=None, host='127.0.0.1', port=8765):
+        if path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(path)
+        else:
+            self._socket = socket.create_connection((host, port))
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._socket.makefile('rwb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def _send(self, requests):
+        self._file.write(b''.join((json.dumps(request) + '\n').encode() for request in requests))
+        self._file.flush()
+        return [json.loads(self._file.readline()) for _ in requests]
+
+    def price(self, config):
+        return self._send([config])[0]
+
+    def price_many(self, configs):
+        """
+        Pipeline configs on the connection so the server can batch them;
+        results come back in input order
+        """
+
+        responses = self._send([{**config, 'id': index} for index, config in enumerate(configs)])
+        ordered = [None] * len(configs)
+        for response in responses:
+            ordered[response.pop('id')] = response
+        return ordered
+
+    def stats(self):
+        return self._send([{'command': 'stats'}])[0]
@@ -0,0 +1,67 @@
+"""
+test_finite_difference.py
+
+Crank-Nicolson engine against Black-Scholes, Reiner-Rubinstein and a
+Leisen-Reimer tree
+"""
+
+import pytest
+from logic.black_scholes import BlackScholesModel
+from logic.barrier_analytic import ReinerRubinsteinModel, discrete_barrier_shift
+from logic.finite_difference import FiniteDifferenceEngine
+from logic.lattice import LatticeEngine
+
+
+CALL = (100.0, 100.0, 1.0, 0.05, 0.25, 0.02, 'call')
+DOWN_AND_OUT = ('down-and-out', 90.0, 0.0)
+
+
+def _engine(size):
+    # as many time steps as spot intervals
+    return FiniteDifferenceEngine(size, grid_points=size)
+
+
+def test_european_converges_at_second_order():
+    exact = BlackScholesModel.price_batch(*CALL)
+
+    errors = [abs(float(_engine(size).price_batch(*CALL, american=False)['price'] - exact['price']))
+              for size in (100, 200)]
+
+    assert errors[1] < errors[0] / 3
+
+
+def test_european_greeks_match_black_scholes():
+    exact = BlackScholesModel.price_batch(*CALL)
+    result = _engine(200).price_batch(*CALL, american=False)
+
+    for name in ('price', 'delta', 'gamma', 'vega', 'rho'):
+        assert float(result[name]) == pytest.approx(float(exact[name]), abs=2e-3), name
+    # Black-Scholes theta is per day, the grid's per year
+    assert float(result['theta']) == pytest.approx(365 * float(exact['theta']), abs=0.02)
+
+
+def test_continuous_barrier_matches_closed_form():
+    exact = ReinerRubinsteinModel.price_batch(*CALL, *DOWN_AND_OUT)
+    result = _engine(200).barrier_batch(*CALL, *DOWN_AND_OUT, None)
+
+    for name in ('price', 'delta', 'gamma', 'vega', 'theta', 'rho'):
+        assert float(result[name]) == pytest.approx(float(exact[name]), abs=5e-3), name
+
+
+def test_discrete_barrier_matches_shifted_closed_form():
+    # weekly monitoring prices like a continuous barrier moved by the Broadie-Glasserman-Kou shift
+    shifted = float(discrete_barrier_shift(90.0, 0.25, 1.0, 52, False))
+    exact = ReinerRubinsteinModel.price_batch(*CALL, 'down-and-out', shifted, 0.0, compute_greeks=False)
+    result = _engine(400).barrier_batch(*CALL, *DOWN_AND_OUT, 52, compute_greeks=False)
+
+    assert float(result['price']) == pytest.approx(float(exact['price']), abs=0.01)
+
+
+def test_american_matches_leisen_reimer_tree():
+    put = (36.0, 40.0, 1.0, 0.06, 0.2, 0.0, 'put')
+    tree = LatticeEngine(501, 'leisen-reimer').price_batch(*put)
+    result = _engine(400).price_batch(*put)
+
+    for name in ('price', 'delta', 'gamma', 'vega', 'rho'):
+        assert float(result[name]) == pytest.approx(float(tree[name]), abs=2e-3), name
+    assert float(result['theta']) == pytest.approx(float(tree['theta']), abs=0.01)
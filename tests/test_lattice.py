@@ -0,0 +1,71 @@
+"""
+test_lattice.py
+
+Tree engines against Black-Scholes, a fine Crank-Nicolson reference and the
+closed-form American approximations
+"""
+
+import pytest
+from calculator import calculate_from_config
+from logic.black_scholes import BlackScholesModel
+from logic.lattice import LatticeEngine
+
+
+# config/american_put_lattice.json at the default 252 steps
+AMERICAN_PUT = {
+    'option_style': 'american',
+    'option_type': 'put',
+    'underlying_price': 36.0,
+    'strike_price': 40.0,
+    'time_to_maturity': 1.0,
+    'volatility': 0.2,
+    'risk_free_rate': 0.06,
+    'engine': 'lattice'
+}
+
+
+@pytest.fixture(scope='module')
+def reference():
+    return calculate_from_config({**AMERICAN_PUT, 'engine': 'pde', 'grid_points': 800, 'num_steps': 800})
+
+
+@pytest.mark.parametrize('method', ['crr', 'leisen-reimer', 'trinomial'])
+@pytest.mark.parametrize('richardson', [False, True])
+def test_tree_theta_matches_pde(reference, method, richardson):
+    # trinomial thetas oscillate with N by about 0.007; extrapolating them tripled that
+    result = calculate_from_config({**AMERICAN_PUT, 'lattice_method': method, 'richardson': richardson})
+
+    assert result['greeks']['theta'] == pytest.approx(reference['greeks']['theta'], abs=0.01)
+
+
+@pytest.mark.parametrize('method', ['crr', 'leisen-reimer', 'trinomial'])
+def test_european_tree_converges_to_black_scholes(method):
+    args = (36.0, 40.0, 1.0, 0.06, 0.2, 0.0, 'put')
+    exact = BlackScholesModel.price_batch(*args)
+
+    errors = [abs(float(LatticeEngine(num_steps, method).price_batch(*args, american=False)['price'] - exact['price']))
+              for num_steps in (50, 400)]
+    tree = LatticeEngine(400, method).price_batch(*args, american=False)
+
+    assert errors[1] < max(errors[0] / 2, 1e-4)
+    for name in ('price', 'delta', 'gamma', 'vega', 'rho'):
+        assert float(tree[name]) == pytest.approx(float(exact[name]), abs=0.003), name
+
+
+@pytest.mark.parametrize('method', ['crr', 'leisen-reimer', 'trinomial'])
+@pytest.mark.parametrize('richardson', [False, True])
+def test_tree_price_and_greeks_match_pde(reference, method, richardson):
+    result = calculate_from_config({**AMERICAN_PUT, 'lattice_method': method, 'richardson': richardson})
+
+    assert result['price'] == pytest.approx(reference['price'], abs=0.003)
+    for name in ('delta', 'gamma', 'vega', 'rho'):
+        assert result['greeks'][name] == pytest.approx(reference['greeks'][name], abs=0.003), name
+
+
+@pytest.mark.parametrize('method', ['barone-adesi-whaley', 'bjerksund-stensland'])
+def test_closed_form_approximations_are_close_to_pde(reference, method):
+    result = calculate_from_config({**AMERICAN_PUT, 'engine': 'analytic', 'analytic_method': method})
+
+    # both approximations undervalue this put by a couple of cents
+    assert result['price'] == pytest.approx(reference['price'], abs=0.05)
+    assert result['greeks']['delta'] == pytest.approx(reference['greeks']['delta'], abs=0.02)
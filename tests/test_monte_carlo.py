@@ -0,0 +1,192 @@
+"""
+test_monte_carlo.py
+
+Monte Carlo engine: standard errors, adaptive stopping, sampling schemes, Greeks
+and expiry
+"""
+
+import numpy as np
+import pytest
+from calculator import calculate_from_config
+from logic.black_scholes import BlackScholesModel
+from logic.monte_carlo import MonteCarloEngine
+
+
+ASIAN_CALL = {
+    'option_style': 'asian',
+    'option_type': 'call',
+    'underlying_price': 100,
+    'strike_price': 100,
+    'time_to_maturity': 1,
+    'volatility': 0.2,
+    'risk_free_rate': 0.05,
+    'num_steps': 50,
+    'seed': 1
+}
+
+# geometric Asian call on 50 dates, which has a closed form to check simulations against
+GEOMETRIC_ARGS = (100, 100, 1.0, 0.05, 0.2, 0.01, 'call')
+GEOMETRIC_PRICE = BlackScholesModel.geometric_asian_price(*GEOMETRIC_ARGS, 50)
+
+
+def _geometric_estimate(**engine_options):
+    engine = MonteCarloEngine(num_steps=50, **engine_options)
+    return engine.estimate_asian(*GEOMETRIC_ARGS, average_type='geometric')
+
+
+def test_price_within_standard_errors_of_closed_form():
+    estimate = _geometric_estimate(num_simulations=20000, seed=3)
+
+    assert estimate['num_paths'] == 20000
+    assert abs(estimate['price'] - GEOMETRIC_PRICE) < 4 * estimate['std_error']
+
+
+def test_standard_error_shrinks_as_root_paths():
+    small = _geometric_estimate(num_simulations=5000, seed=3)
+    large = _geometric_estimate(num_simulations=20000, seed=3)
+
+    assert large['std_error'] / small['std_error'] == pytest.approx(0.5, rel=0.1)
+
+
+def test_adaptive_run_stops_at_target():
+    estimates = [_geometric_estimate(num_simulations=2000, chunk_size=1000, target_error=0.02, seed=3,
+                                     num_workers=workers) for workers in (1, 4)]
+
+    assert estimates[0]['std_error'] <= 0.02
+    assert estimates[0]['num_paths'] > 2000
+    assert abs(estimates[0]['price'] - GEOMETRIC_PRICE) < 4 * estimates[0]['std_error']
+    # the stopping point depends on the seed and chunk_size only
+    assert estimates[0] == estimates[1]
+
+
+def test_adaptive_run_respects_budget():
+    estimate = _geometric_estimate(num_simulations=2000, chunk_size=1000, target_error=1e-6, max_simulations=9000,
+                                   seed=3)
+
+    assert estimate['num_paths'] == 9000
+    assert estimate['std_error'] > 1e-6
+
+
+@pytest.mark.parametrize('sampling', ['pseudo', 'antithetic', 'sobol'])
+def test_sampling_schemes_agree_with_closed_form(sampling):
+    estimate = _geometric_estimate(num_simulations=4096, seed=3, sampling=sampling)
+
+    assert abs(estimate['price'] - GEOMETRIC_PRICE) < 4 * estimate['std_error']
+
+
+def test_sampling_schemes_reduce_the_error():
+    errors = {sampling: _geometric_estimate(num_simulations=4096, seed=3, sampling=sampling)['std_error']
+              for sampling in ('pseudo', 'antithetic', 'sobol')}
+
+    assert errors['antithetic'] < errors['pseudo']
+    assert errors['sobol'] < errors['pseudo'] / 5
+
+
+def test_sobol_standard_error_matches_spread_over_seeds():
+    # the i.i.d. formula overstates quasi-random errors several times over
+    engines = [MonteCarloEngine(1024, 16, seed=seed, sampling='sobol') for seed in range(24)]
+    estimates = [engine.estimate_asian(*GEOMETRIC_ARGS) for engine in engines]
+    spread = np.std([estimate['price'] for estimate in estimates], ddof=1)
+    reported = np.mean([estimate['std_error'] for estimate in estimates])
+
+    assert 0.5 < reported / spread < 2
+
+
+def test_antithetic_adaptive_run_with_odd_budget():
+    # an odd max_simulations used to leave a one-path tail block that cannot be mirrored
+    config = {**ASIAN_CALL, 'sampling': 'antithetic', 'target_error': 1e-4, 'max_simulations': 2501,
+              'chunk_size': 500, 'num_simulations': 1000}
+
+    result = calculate_from_config(config, compute_greeks=False)
+
+    assert result['num_paths'] == 2502
+    assert result['std_error'] > 1e-4
+
+
+def test_expired_positions_settle_at_intrinsic():
+    # a 95 put expiring with spot at 90: worth 5, delta -1, nothing else
+    expired = {**ASIAN_CALL, 'option_type': 'put', 'strike_price': 95, 'underlying_price': 90,
+               'time_to_maturity': 0}
+    barrier = {'option_style': 'barrier', 'barrier_type': 'down-and-out', 'barrier_level': 80,
+               'engine': 'monte_carlo'}
+
+    for extra in ({'control_variate': False}, {'option_style': 'american', 'engine': 'monte_carlo'},
+                  {**barrier, 'monitoring': 'discrete'}, {**barrier, 'monitoring': 'discrete', 'monitoring_points': 12},
+                  barrier):
+        result = calculate_from_config({**expired, **extra})
+
+        assert result['price'] == 5.0
+        assert result['greeks'] == pytest.approx({'delta': -1.0, 'gamma': 0.0, 'vega': 0.0, 'theta': 0.0, 'rho': 0.0})
+
+
+@pytest.mark.filterwarnings('error')
+def test_expired_barrier_accumulator_skips_the_bridge():
+    # the crossing probability between steps has zero variance at T = 0
+    engine = MonteCarloEngine(1000, 20, seed=1)
+
+    for monitoring, monitoring_points in (('continuous', None), ('discrete', 12)):
+        accumulator, discount = engine.barrier_accumulator(90, 95, 0.0, 0.05, 0.25, 0, 'put', 'down-and-out', 80,
+                                                           2.0, monitoring, monitoring_points)
+        estimate = engine.estimate(engine.simulate_stepwise(90, 0.0, 0.05, 0.25, 0, accumulator, discount),
+                                   discount)
+
+        assert estimate['price'] == 5.0
+        assert estimate['std_error'] == 0.0
+
+
+MC_PUT = {
+    'option_type': 'put',
+    'underlying_price': 100,
+    'strike_price': 100,
+    'time_to_maturity': 1,
+    'volatility': 0.25,
+    'risk_free_rate': 0.05,
+    'num_simulations': 20000,
+    'num_steps': 50,
+    'seed': 0
+}
+DOWN_AND_IN = {'option_style': 'barrier', 'barrier_type': 'down-and-in', 'barrier_level': 90}
+
+# about four seed-to-seed standard deviations of the pathwise Greeks at 20000 paths
+GREEK_TOLERANCES = {'delta': 0.02, 'gamma': 0.004, 'vega': 0.02, 'theta': 0.15, 'rho': 0.025}
+
+
+@pytest.mark.parametrize('position', [
+    {'option_style': 'asian', 'control_variate': False},
+    {**DOWN_AND_IN, 'engine': 'monte_carlo'},
+    {**DOWN_AND_IN, 'monitoring': 'discrete', 'monitoring_points': 252},
+], ids=['asian', 'continuous-barrier', 'shifted-barrier'])
+def test_pathwise_greeks_agree_with_bumps(position):
+    pathwise = calculate_from_config({**MC_PUT, **position})['greeks']
+    bumped = calculate_from_config({**MC_PUT, **position, 'mc_greeks': 'bump'})['greeks']
+
+    # gamma is left out: bumping the payoff twice is far noisier than the estimator it checks
+    for name in ('delta', 'vega', 'theta', 'rho'):
+        assert pathwise[name] == pytest.approx(bumped[name], abs=GREEK_TOLERANCES[name] / 4), name
+
+
+@pytest.mark.parametrize('position, reference', [
+    ({**DOWN_AND_IN, 'engine': 'monte_carlo'}, {**DOWN_AND_IN, 'engine': 'analytic'}),
+    ({'option_style': 'american', 'engine': 'monte_carlo'},
+     {'option_style': 'american', 'engine': 'lattice', 'lattice_method': 'leisen-reimer', 'num_steps': 501}),
+], ids=['barrier-vs-closed-form', 'american-vs-lattice'])
+def test_simulated_greeks_agree_with_deterministic_engines(position, reference):
+    simulated = calculate_from_config({**MC_PUT, **position})
+    exact = calculate_from_config({**MC_PUT, **reference})
+
+    assert abs(simulated['price'] - exact['price']) < 4 * simulated['std_error']
+    for name, tolerance in GREEK_TOLERANCES.items():
+        assert simulated['greeks'][name] == pytest.approx(exact['greeks'][name], abs=tolerance), name
+
+
+def test_step_monitored_barrier_greeks_agree_with_pde():
+    # bumped delta and theta and the likelihood-ratio gamma are noisier: four of their standard deviations
+    position = {**MC_PUT, **DOWN_AND_IN, 'monitoring': 'discrete', 'monitoring_points': 50}
+    tolerances = {**GREEK_TOLERANCES, 'delta': 0.1, 'gamma': 0.04, 'theta': 0.4}
+
+    simulated = calculate_from_config(position)
+    exact = calculate_from_config({**position, 'engine': 'pde', 'grid_points': 400, 'num_steps': 400})
+
+    assert abs(simulated['price'] - exact['price']) < 4 * simulated['std_error']
+    for name, tolerance in tolerances.items():
+        assert simulated['greeks'][name] == pytest.approx(exact['greeks'][name], abs=tolerance), name
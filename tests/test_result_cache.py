@@ -0,0 +1,54 @@
+"""
+test_result_cache.py
+
+Cache keys: one per contract, whatever else a config carries
+"""
+
+from result_cache import ResultCache, canonical_key
+
+
+AMERICAN_PUT = {
+    'option_style': 'american',
+    'option_type': 'put',
+    'underlying_price': 100,
+    'strike_price': 100,
+    'time_to_maturity': 1,
+    'volatility': 0.2,
+    'risk_free_rate': 0.05,
+    'engine': 'lattice',
+    'num_steps': 100
+}
+
+
+def test_key_ignores_non_pricing_fields():
+    assert canonical_key({**AMERICAN_PUT, 'id': 1, 'label': 'desk a'}) == canonical_key({**AMERICAN_PUT, 'id': 2})
+
+
+def test_key_fills_in_defaults():
+    explicit = {**AMERICAN_PUT, 'dividend_yield': 0, 'lattice_method': 'CRR', 'richardson': False, 'strike_price': '100'}
+
+    assert canonical_key(explicit) == canonical_key(AMERICAN_PUT)
+    assert canonical_key({**AMERICAN_PUT, 'lattice_method': 'trinomial'}) != canonical_key(AMERICAN_PUT)
+    # a Monte Carlo setting the lattice never reads
+    assert canonical_key({**AMERICAN_PUT, 'num_simulations': 5}) == canonical_key(AMERICAN_PUT)
+
+
+def test_key_defaults_the_engine():
+    barrier = {**AMERICAN_PUT, 'option_style': 'barrier', 'barrier_type': 'down-and-out', 'barrier_level': 90}
+    del barrier['engine']
+
+    assert canonical_key(barrier) == canonical_key({**barrier, 'engine': 'analytic'})
+    assert canonical_key(barrier) != canonical_key({**barrier, 'engine': 'monte_carlo', 'seed': 1})
+
+
+def test_portfolio_values_identical_contracts_once():
+    configs = [{**AMERICAN_PUT, 'id': index} for index in range(3)]
+
+    with ResultCache() as cache:
+        results = sorted(cache.calculate_portfolio(configs), key=lambda result: result['position'])
+        stats = cache.stats()
+
+    assert stats['misses'] == 1
+    assert stats['hits'] == 2
+    assert [result['parameters']['id'] for result in results] == [0, 1, 2]
+    assert len({result['price'] for result in results}) == 1
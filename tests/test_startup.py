@@ -0,0 +1,87 @@
+"""
+test_startup.py
+
+Start-up cost of the CLI: --help and a European valuation must not pay
+for the Monte Carlo, PDE or SciPy imports they never use
+"""
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# generous against the README's tens of milliseconds / quarter second, so
+# only a heavy import creeping back in fails them
+HELP_BUDGET = 1.0
+EUROPEAN_BUDGET = 2.0
+
+EUROPEAN_CALL = {
+    'option_style': 'european',
+    'option_type': 'call',
+    'underlying_price': 100,
+    'strike_price': 100,
+    'time_to_maturity': 1,
+    'volatility': 0.2,
+    'risk_free_rate': 0.05
+}
+
+
+def _run(*args):
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    return completed, time.perf_counter() - started
+
+
+def test_help_is_fast():
+    completed, elapsed = _run('main.py', '--help')
+
+    assert completed.returncode == 0, completed.stderr
+    assert 'usage' in completed.stdout
+    assert elapsed < HELP_BUDGET
+
+
+def test_european_config_is_fast(tmp_path):
+    config = tmp_path / 'european_call.json'
+    config.write_text(json.dumps(EUROPEAN_CALL))
+
+    completed, elapsed = _run('main.py', '--config', str(config))
+
+    assert completed.returncode == 0, completed.stderr
+    assert elapsed < EUROPEAN_BUDGET
+
+
+def test_european_valuation_skips_scipy_stats():
+    script = (
+        "import sys\n"
+        "from calculator import OptionCalculator\n"
+        f"OptionCalculator({EUROPEAN_CALL!r}).calculate()\n"
+        "print('scipy.stats' in sys.modules)\n"
+    )
+
+    completed, _ = _run('-c', script)
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == 'False'
+
+
+def test_american_engines_load_only_their_own_module():
+    engines = {'monte_carlo': 'logic.monte_carlo', 'lattice': 'logic.lattice', 'analytic': 'logic.american_approx',
+               'pde': 'logic.finite_difference'}
+    american_put = {**EUROPEAN_CALL, 'option_style': 'american', 'option_type': 'put'}
+
+    for engine, module in engines.items():
+        script = (
+            "import sys\n"
+            "from calculator import OptionCalculator\n"
+            f"OptionCalculator({dict(american_put, engine=engine)!r}).create_option()\n"
+            f"print(sorted(name for name in {sorted(engines.values())!r} if name in sys.modules))\n"
+        )
+
+        completed, _ = _run('-c', script)
+
+        assert completed.returncode == 0, completed.stderr
+        assert completed.stdout.strip() == repr([module])
@@ -0,0 +1,231 @@
+"""
+columnar.py
+
+Bulk writers for book-level runs: one row per position with its key
+parameters, price and Greeks, buffered and written a block at a time
+"""
+
+import csv
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+from pathlib import Path
+import numpy as np
+
+
+COLUMNAR_FORMATS = ('csv', 'npy', 'npz', 'parquet', 'arrow')
+
+# rows held in memory between bulk writes
+BUFFER_ROWS = 65536
+
+TEXT_COLUMNS = {'option_style': 'U8', 'option_type': 'U4'}
+PARAMETER_COLUMNS = ('underlying_price', 'strike_price', 'time_to_maturity', 'volatility', 'risk_free_rate',
+                     'dividend_yield')
+GREEK_COLUMNS = ('delta', 'gamma', 'vega', 'theta', 'rho')
+
+
+def result_columns(detailed=True, with_error=True):
+    """(name, dtype) of every output column, in file order"""
+
+    columns = [('position', np.int64)]
+    columns += list(TEXT_COLUMNS.items())
+    columns += [(name, np.float64) for name in PARAMETER_COLUMNS]
+    columns += [('price', np.float64), ('std_error', np.float64), ('num_paths', np.int64)]
+    if detailed:
+        columns += [(name, np.float64) for name in GREEK_COLUMNS]
+    if with_error:
+        columns.append(('error', object))
+    return columns
+
+
+def _float_or_none(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _NpyStream:
+    """
+    A .npy file holding a 1-d array that is appended to a block at a time.
+    The header is sized for any length up front and rewritten on close.
+    """
+
+    def __init__(self, path, dtype):
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        # room for the longest possible shape, padded to NumPy's 64-byte alignment
+        longest = len(self._header(np.iinfo(np.int64).max)) + 1
+        self._header_size = -(-(10 + longest) // 64) * 64 - 10
+        self._file = open(path, 'wb')
+        self._write_header()
+
+    def _header(self, length):
+        return repr({'descr': np.lib.format.dtype_to_descr(self.dtype), 'fortran_order': False, 'shape': (length,)})
+
+    def _write_header(self):
+        header = self._header(self.length).ljust(self._header_size - 1) + '\n'
+        self._file.write(b'\x93NUMPY\x01\x00' + struct.pack('<H', self._header_size) + header.encode('latin1'))
+
+    def append(self, block):
+        np.ascontiguousarray(block, dtype=self.dtype).tofile(self._file)
+        self.length += len(block)
+
+    def close(self):
+        self._file.seek(0)
+        self._write_header()
+        self._file.close()
+
+
+class ColumnarWriter:
+    """
+    Writes many results into one CSV, .npy (a structured array), .npz (one
+    array per column) or, with pyarrow installed, Parquet or Arrow IPC file.
+    format defaults to the output file's extension. Rows are buffered and
+    written buffer_rows at a time, so a million results take a few dozen
+    bulk writes; close() (or leaving the with block) finalises the file.
+
+    Missing values (Greeks without compute_greeks, std_error outside Monte
+    Carlo, the outputs of failed positions) are empty in CSV, NaN in NumPy
+    and null in Arrow. The NumPy formats have no 'error' column, so a failed
+    position shows up there as a NaN price.
+    """
+
+    def __init__(self, output_path, format=None, detailed=True, buffer_rows=BUFFER_ROWS):
+        format = (format or Path(output_path).suffix.lstrip('.')).lower()
+        if format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unsupported output format: {format}")
+        if buffer_rows < 1:
+            raise ValueError("buffer_rows must be at least 1")
+
+        self.output_path = output_path
+        self.format = format
+        self.buffer_rows = buffer_rows
+        self.columns = result_columns(detailed, with_error=format not in ('npy', 'npz'))
+        self.count = 0
+        self._detailed = detailed
+        self._with_error = format not in ('npy', 'npz')
+        # one tuple per row, transposed into columns at flush time
+        self._rows = []
+        self._closed = False
+
+        if format == 'csv':
+            self._file = open(output_path, 'w', newline='', buffering=1 << 20)
+            self._csv = csv.writer(self._file)
+            self._csv.writerow([name for name, _ in self.columns])
+
+        elif format == 'npy':
+            self._stream = _NpyStream(output_path, np.dtype(self.columns))
+
+        elif format == 'npz':
+            # each column streams to its own .npy, zipped together on close
+            self._tmpdir = tempfile.mkdtemp(dir=Path(output_path).resolve().parent)
+            self._streams = {name: _NpyStream(os.path.join(self._tmpdir, f"{name}.npy"), dtype)
+                             for name, dtype in self.columns}
+
+        else:
+            try:
+                import pyarrow as pa
+            except ImportError:
+                raise ValueError(f"{format} output requires pyarrow (pip install pyarrow)")
+
+            arrow_types = {np.int64: pa.int64(), np.float64: pa.float64(), object: pa.string()}
+            self._schema = pa.schema([(name, arrow_types.get(dtype, pa.string())) for name, dtype in self.columns])
+            if format == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(output_path, self._schema)
+            else:
+                self._sink = pa.OSFile(str(output_path), 'wb')
+                self._writer = pa.ipc.new_file(self._sink, self._schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, result):
+        """Buffer one result (a calculate_from_config / calculate_portfolio dict)"""
+
+        params = result.get('parameters') or {}
+
+        # spelled out column by column: this runs once per position
+        row = (int(result.get('position', self.count)),
+               str(params.get('option_style', '')).lower(), str(params.get('option_type', '')).lower(),
+               _float_or_none(params.get('underlying_price')), _float_or_none(params.get('strike_price')),
+               _float_or_none(params.get('time_to_maturity')), _float_or_none(params.get('volatility')),
+               _float_or_none(params.get('risk_free_rate')), _float_or_none(params.get('dividend_yield', 0.0)),
+               result.get('price'), result.get('std_error'), int(result.get('num_paths', 0)))
+        if self._detailed:
+            greeks = result.get('greeks') or {}
+            row += (greeks.get('delta'), greeks.get('gamma'), greeks.get('vega'), greeks.get('theta'),
+                    greeks.get('rho'))
+        if self._with_error:
+            row += (result.get('error'),)
+
+        self._rows.append(row)
+        self.count += 1
+        if len(self._rows) >= self.buffer_rows:
+            self.flush()
+
+    def write_all(self, results):
+        for result in results:
+            self.write(result)
+        return self.count
+
+    def flush(self):
+        """Write the buffered rows in one block"""
+
+        if not self._rows:
+            return
+
+        if self.format == 'csv':
+            self._csv.writerows(self._rows)
+
+        elif self.format in ('npy', 'npz'):
+            arrays = {name: np.array(values, dtype=dtype)
+                      for (name, dtype), values in zip(self.columns, zip(*self._rows))}
+            if self.format == 'npy':
+                block = np.empty(len(self._rows), dtype=self._stream.dtype)
+                for name, values in arrays.items():
+                    block[name] = values
+                self._stream.append(block)
+            else:
+                for name, values in arrays.items():
+                    self._streams[name].append(values)
+
+        else:
+            import pyarrow as pa
+            columns = [list(values) for values in zip(*self._rows)]
+            self._writer.write_table(pa.Table.from_arrays(columns, schema=self._schema))
+
+        self._rows.clear()
+
+    def close(self):
+
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+
+        if self.format == 'csv':
+            self._file.close()
+
+        elif self.format == 'npy':
+            self._stream.close()
+
+        elif self.format == 'npz':
+            try:
+                with zipfile.ZipFile(self.output_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+                    for name, stream in self._streams.items():
+                        stream.close()
+                        archive.write(stream._file.name, f"{name}.npy")
+            finally:
+                shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+        else:
+            self._writer.close()
+            if self.format == 'arrow':
+                self._sink.close()
@@ -1,3 +1,4 @@
+import sys
 import json
 from pathlib import Path
 
@@ -17,6 +18,31 @@ class ConfigReader:
 
         return config
 
+    @staticmethod
+    def read_portfolio(portfolio_path):
+        """Read many position configs from a JSON lines file or a directory of *.json files"""
+
+        portfolio = Path(portfolio_path)
+
+        if not portfolio.exists():
+            raise FileNotFoundError(f"Portfolio not found: {portfolio_path}")
+
+        if portfolio.is_dir():
+            return [ConfigReader.read_config(path) for path in sorted(portfolio.glob('*.json'))]
+
+        configs = []
+        with open(portfolio, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    configs.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {line_number} of {portfolio_path}: {e}")
+
+        return configs
+
     @staticmethod
     def validate_config(config):
 
@@ -29,12 +55,12 @@ class ConfigReader:
 
         # Validate option_style
         valid_styles = ['european', 'american', 'asian', 'barrier']
-        if config['option_style'].lower() not in valid_styles:
+        if not isinstance(config['option_style'], str) or config['option_style'].lower() not in valid_styles:
             return False, f"Invalid option_style. Must be one of: {', '.join(valid_styles)}"
 
         # Validate option_type
         valid_types = ['call', 'put']
-        if config['option_type'].lower() not in valid_types:
+        if not isinstance(config['option_type'], str) or config['option_type'].lower() not in valid_types:
             return False, f"Invalid option_type. Must be one of: {', '.join(valid_types)}"
 
         # Validate barrier
@@ -60,6 +86,50 @@ class ResultWriter:
         else:
             ResultWriter.write_to_file(results, output_path, format)
 
+    @staticmethod
+    def stream_results(results, output_path=None, detailed=True, format='json'):
+        """
+        Write an iterable of results as JSON lines, one per position, as they
+        arrive, or with a columnar format (csv, npy, npz, parquet, arrow) as
+        one table written in bulk blocks
+        """
+
+        if format.lower() != 'json':
+            if output_path is None:
+                raise ValueError(f"{format} output needs an output file")
+            count = ResultWriter.write_columnar(results, output_path, format, detailed)
+            print(f"\n{count} results written to: {output_path}")
+            return count
+
+        output_file = open(output_path, 'w') if output_path is not None else sys.stdout
+        count = 0
+
+        try:
+            for result in results:
+                if not detailed:
+                    result = {key: value for key, value in result.items() if key != 'greeks'}
+                output_file.write(json.dumps(result) + "\n")
+                output_file.flush()
+                count += 1
+        finally:
+            if output_path is not None:
+                output_file.close()
+
+        if output_path is not None:
+            print(f"\n{count} results written to: {output_path}")
+
+        return count
+
+    @staticmethod
+    def write_columnar(results, output_path, format=None, detailed=True):
+        """Write an iterable of results to one columnar file; returns the number of rows"""
+
+        # NumPy (and pyarrow) are only loaded for columnar output
+        from .columnar import ColumnarWriter
+
+        with ColumnarWriter(output_path, format, detailed) as writer:
+            return writer.write_all(results)
+
     @staticmethod
     def write_to_console(results, detailed=True):
 
@@ -75,6 +145,8 @@ class ResultWriter:
 
         print("\n" + "-"*60)
         print(f"Option Price: ${results['price']:.4f}")
+        if results.get('std_error') is not None:
+            print(f"Std Error:    {results['std_error']:.4f} ({results['num_paths']} paths)")
         print("-"*60)
 
         if detailed and 'greeks' in results and results['greeks'] is not None:
@@ -114,6 +186,8 @@ class ResultWriter:
 
                 f.write("\n" + "-"*60 + "\n")
                 f.write(f"Option Price: ${results['price']:.4f}\n")
+                if results.get('std_error') is not None:
+                    f.write(f"Std Error:    {results['std_error']:.4f} ({results['num_paths']} paths)\n")
                 f.write("-"*60 + "\n")
 
                 if 'greeks' in results and results['greeks'] is not None:
@@ -131,4 +205,6 @@ class ResultWriter:
             print(f"\nResults written to: {output_path}")
 
         else:
-            raise ValueError(f"Unsupported output format: {format}")
\ No newline at end of file
+            # a one-row table; raises for formats it does not know either
+            ResultWriter.write_columnar([results], output_path, format)
+            print(f"\nResults written to: {output_path}")
\ No newline at end of file
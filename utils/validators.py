@@ -23,16 +23,26 @@ def validate_option_params(S, K, T, r, sigma, q=0):
     return True, None
 
 
-def validate_barrier_params(barrier_type, barrier_level, S):
+def validate_barrier_params(barrier_type, barrier_level, S, rebate=0.0, monitoring='continuous', monitoring_points=None):
 
     valid_types = ['up-and-out', 'up-and-in', 'down-and-out', 'down-and-in']
+    valid_monitoring = ['continuous', 'discrete']
 
     if barrier_type.lower() not in valid_types:
         return False, f"Invalid barrier_type. Must be one of: {', '.join(valid_types)}"
 
+    if monitoring.lower() not in valid_monitoring:
+        return False, f"Invalid monitoring. Must be one of: {', '.join(valid_monitoring)}"
+
     if barrier_level <= 0:
         return False, "Barrier level must be positive"
 
+    if rebate < 0:
+        return False, "Rebate must be non-negative"
+
+    if monitoring_points is not None and monitoring_points <= 0:
+        return False, "monitoring_points must be positive"
+
     if 'up' in barrier_type.lower() and barrier_level <= S:
         return False, "For up-barriers, barrier level must be > stock price"
 
@@ -49,4 +59,102 @@ def validate_asian_params(average_type):
     if average_type.lower() not in valid_types:
         return False, f"Invalid average_type. Must be one of: {', '.join(valid_types)}"
 
-    return True, None
\ No newline at end of file
+    return True, None
+
+
+def validate_engine_params(chunk_size=None, num_workers=1, target_error=None, max_simulations=None, sampling='pseudo',
+                           lsm_basis='monomial', lsm_degree=2, greeks='pathwise'):
+
+    errors = []
+
+    if chunk_size is not None and chunk_size <= 0:
+        errors.append("chunk_size must be positive")
+
+    if num_workers < 0:
+        errors.append("num_workers must not be negative")
+
+    if target_error is not None and target_error <= 0:
+        errors.append("target_error must be positive")
+
+    if max_simulations is not None and max_simulations <= 0:
+        errors.append("max_simulations must be positive")
+
+    valid_sampling = ['pseudo', 'antithetic', 'sobol']
+    if sampling.lower() not in valid_sampling:
+        errors.append(f"sampling must be one of: {', '.join(valid_sampling)}")
+
+    valid_bases = ['monomial', 'laguerre']
+    if lsm_basis.lower() not in valid_bases:
+        errors.append(f"lsm_basis must be one of: {', '.join(valid_bases)}")
+
+    if lsm_degree < 1:
+        errors.append("lsm_degree must be at least 1")
+
+    valid_greeks = ['pathwise', 'bump']
+    if greeks.lower() not in valid_greeks:
+        errors.append(f"mc_greeks must be one of: {', '.join(valid_greeks)}")
+
+    if errors:
+        return False, "; ".join(errors)
+
+    return True, None
+
+
+# pricing engines each option style can be valued with; calculator.default_engine picks
+# one when a config names none (monte_carlo, or analytic for continuous barriers)
+VALID_ENGINES = {
+    'european': ['analytic'],
+    'american': ['monte_carlo', 'lattice', 'analytic', 'pde'],
+    'asian': ['monte_carlo'],
+    'barrier': ['monte_carlo', 'analytic', 'pde'],
+}
+
+
+def validate_engine_choice(option_style, engine):
+
+    valid_engines = VALID_ENGINES.get(option_style.lower())
+
+    # european options are always priced analytically, whatever engine says
+    if valid_engines is None or option_style.lower() == 'european':
+        return True, None
+
+    if engine.lower() not in valid_engines:
+        return False, f"Invalid engine for {option_style} options. Must be one of: {', '.join(valid_engines)}"
+
+    return True, None
+
+
+def validate_lattice_params(method):
+
+    valid_methods = ['crr', 'leisen-reimer', 'trinomial']
+
+    if method.lower() not in valid_methods:
+        return False, f"Invalid lattice_method. Must be one of: {', '.join(valid_methods)}"
+
+    return True, None
+
+
+def validate_analytic_params(method):
+
+    valid_methods = ['barone-adesi-whaley', 'bjerksund-stensland']
+
+    if method.lower() not in valid_methods:
+        return False, f"Invalid analytic_method. Must be one of: {', '.join(valid_methods)}"
+
+    return True, None
+
+
+def validate_pde_params(grid_points, rannacher_steps):
+
+    errors = []
+
+    if grid_points < 4:
+        errors.append("grid_points must be at least 4")
+
+    if rannacher_steps < 0:
+        errors.append("rannacher_steps must not be negative")
+
+    if errors:
+        return False, "; ".join(errors)
+
+    return True, None